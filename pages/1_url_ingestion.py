@@ -1,24 +1,30 @@
-import json
+import copy
+import functools
+import hashlib
+import re
 
 import anthropic
+import httpx
+import numpy as np
 import streamlit as st
 import trafilatura
 from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 
+from utils.chat import clear_query_cache
 from utils.db import (
+    get_alias_index,
     get_fighter_aliases,
     get_or_create_event,
-    get_or_create_fight,
-    save_alias,
-    save_analyst_pick,
-    save_pick_tags,
+    save_aliases_bulk,
+    save_picks_bulk,
 )
 
 # ── Constants ────────────────────────────────────────────────────────────────
 
 EXTRACTION_PROMPT = """You are a data extraction assistant for MMA fight predictions. You will be given the text of a sports article containing analyst fight picks.
 
-Your job is to extract all fight predictions and return them as structured JSON only. No explanation, no markdown, no preamble — raw JSON only.
+Your job is to extract all fight predictions and record them with the provided tool.
 
 Rules:
 1. Detect whether this is a single-analyst article or a multi-analyst "staff picks" article.
@@ -43,36 +49,95 @@ Rules:
 11. Never invent or assume a pick. When in doubt, flag it.
 12. Extract the publication or platform name (e.g. "MMA Fighting", "Bleacher Report", "YouTube", "Podcast") and put it in the top-level "platform" field. Use the outlet name, not the URL. If unclear, use null.
 13. Extract the event location if mentioned (city and state/country) and put it in the top-level "event_location" field. Use null if not stated.
-
-Return this JSON structure:
-{
-  "article_type": "single" or "staff",
-  "platform": "string or null",
-  "event_location": "string or null",
-  "analysts": [
-    {
-      "analyst_name": "string",
-      "picks": [
-        {
-          "fighter_a": "string",
-          "fighter_b": "string",
-          "weight_class": "string or null",
-          "picked_fighter": "string or null",
-          "nickname_used": "string or null",
-          "alt_spelling_note": "string or null",
-          "method_prediction": "KO/TKO" or "Submission" or "Decision" or "NC" or "DQ" or null,
-          "confidence_tag": "lean / confident / lock",
-          "reasoning_notes": "string or null",
-          "flag_for_review": false
-        }
-      ]
-    }
-  ]
-}"""
+14. Set "confidence_tag" to "lean", "confident" or "lock" according to how strongly the analyst backs the pick."""
 
 CONFIDENCE_OPTIONS = ["lean", "confident", "lock"]
 METHOD_OPTIONS = ["", "KO/TKO", "Submission", "Decision", "NC", "DQ"]
+_CONF_INDEX = {c: i for i, c in enumerate(CONFIDENCE_OPTIONS)}
+_METHOD_INDEX = {m: i for i, m in enumerate(METHOD_OPTIONS)}
 FUZZY_THRESHOLD = 85
+# ~6K tokens. Longer articles keep their head and tail (staff-pick summaries
+# usually sit at one end) and drop the middle.
+MAX_INPUT_CHARS = 24_000
+# Output budget per article, and Claude Haiku 4.5's output ceiling. A batch is
+# capped at as many articles as fit, so no article gets less than its budget.
+OUTPUT_TOKENS_PER_ARTICLE = 4096
+MAX_OUTPUT_TOKENS = 64_000
+MAX_BATCH_ARTICLES = MAX_OUTPUT_TOKENS // OUTPUT_TOKENS_PER_ARTICLE
+
+# Forced tool call: the API hands back the extraction as an already-parsed dict
+# matching this schema, so no fence-stripping or json.loads is needed.
+_NULLABLE_STRING = {"type": ["string", "null"]}
+EXTRACTION_TOOL = {
+    "name": "emit_picks",
+    "description": "Record every analyst pick extracted from the article.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "article_type": {"type": "string", "enum": ["single", "staff"]},
+            "platform": _NULLABLE_STRING,
+            "event_location": _NULLABLE_STRING,
+            "analysts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "analyst_name": {"type": "string"},
+                        "picks": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "fighter_a": {"type": "string"},
+                                    "fighter_b": {"type": "string"},
+                                    "weight_class": _NULLABLE_STRING,
+                                    "picked_fighter": _NULLABLE_STRING,
+                                    "nickname_used": _NULLABLE_STRING,
+                                    "alt_spelling_note": _NULLABLE_STRING,
+                                    "method_prediction": {
+                                        "enum": [m for m in METHOD_OPTIONS if m] + [None],
+                                    },
+                                    "confidence_tag": {"type": "string", "enum": CONFIDENCE_OPTIONS},
+                                    "reasoning_notes": _NULLABLE_STRING,
+                                    "flag_for_review": {"type": "boolean"},
+                                },
+                                "required": ["fighter_a", "fighter_b", "picked_fighter", "flag_for_review"],
+                            },
+                        },
+                    },
+                    "required": ["analyst_name", "picks"],
+                },
+            },
+        },
+        "required": ["article_type", "analysts"],
+    },
+}
+
+# Batch mode: several articles in one request, one "articles" entry per article
+_ARTICLE_SCHEMA = EXTRACTION_TOOL["input_schema"]
+BATCH_EXTRACTION_TOOL = {
+    "name": "emit_article_picks",
+    "description": "Record the picks extracted from each article, one entry per article.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "articles": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"url": {"type": "string"}, **_ARTICLE_SCHEMA["properties"]},
+                    "required": ["url", *_ARTICLE_SCHEMA["required"]],
+                },
+            },
+        },
+        "required": ["articles"],
+    },
+}
+BATCH_INSTRUCTIONS = (
+    'The text below contains several articles, each starting with a header line like '
+    '"=== ARTICLE 1 (url=...) ===". Apply the rules above to each article independently '
+    'and return one entry per article in "articles", copying its url exactly.'
+)
 
 # Normalize free-text method strings Claude might return to the canonical values above
 _METHOD_NORMALIZER = {
@@ -101,81 +166,407 @@ _METHOD_NORMALIZER = {
     "dq": "DQ",
     "disqualification": "DQ",
 }
+# Canonical values map to themselves so the common case is a single dict hit
+_METHOD_NORMALIZER.update({m: m for m in METHOD_OPTIONS if m})
+
 
+# Splits "a, b ,c" into tags, swallowing the whitespace around each comma
+_TAG_SPLIT = re.compile(r"\s*,\s*")
 
+
+@functools.lru_cache(maxsize=128)
 def normalize_method(raw: str | None) -> str:
     """Map any Claude-returned method string to an exact METHOD_OPTIONS value, or ''."""
     if not raw:
         return ""
-    key = raw.strip().lower()
-    if raw in METHOD_OPTIONS:
-        return raw
-    return _METHOD_NORMALIZER.get(key, "")
+    return _METHOD_NORMALIZER.get(raw) or _METHOD_NORMALIZER.get(raw.strip().lower(), "")
 
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Return a shared keep-alive HTTP client for article downloads."""
+    return httpx.Client(
+        follow_redirects=True,
+        timeout=15,
+        headers={
+            "User-Agent": (
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+            )
+        },
+    )
+
+
+# Cached for a day so starting over or retrying the same URL doesn't refetch it.
+# Every failure raises instead of returning None: exceptions are never cached,
+# so a failed or transient fetch can be retried straight away.
+@st.cache_data(ttl=86400, show_spinner=False)
+def _fetch_article(url: str) -> str:
+    resp = get_http_client().get(url)
+    resp.raise_for_status()
+    # Tables are kept on purpose: quick-pick summaries are often laid out as tables.
+    # Try without trafilatura's slower fallback extractors first.
+    text = (
+        trafilatura.extract(resp.content, include_comments=False, fast=True)
+        or trafilatura.extract(resp.content, include_comments=False)
+    )
+    if not text:
+        raise ValueError(f"No article text found at {url}")
+    return text
+
+
 def scrape_url(url: str) -> str | None:
-    downloaded = trafilatura.fetch_url(url)
-    if downloaded:
-        return trafilatura.extract(downloaded)
-    return None
+    # Any failure (bad URL, HTTP error, no text) falls back to pasting the text
+    try:
+        return _fetch_article(url)
+    except Exception:
+        return None
+
 
+def truncate_article(article_text: str) -> str:
+    """Keep the head and tail of articles longer than MAX_INPUT_CHARS."""
+    if len(article_text) <= MAX_INPUT_CHARS:
+        return article_text
+    half = MAX_INPUT_CHARS // 2 - 50
+    return article_text[:half] + "\n\n[...snip...]\n\n" + article_text[-half:]
 
-def call_claude(article_text: str) -> dict:
+
+def _get_anthropic_key() -> str:
     # Support both nested [anthropic] section and flat ANTHROPIC_API_KEY
     if "anthropic" in st.secrets:
-        api_key = st.secrets["anthropic"]["api_key"]
-    elif "ANTHROPIC_API_KEY" in st.secrets:
-        api_key = st.secrets["ANTHROPIC_API_KEY"]
-    else:
-        available = list(st.secrets.keys())
-        raise KeyError(
-            f"Anthropic API key not found. Available secret keys: {available}. "
-            "Add ANTHROPIC_API_KEY = \"sk-ant-...\" to your Streamlit secrets."
-        )
-    client = anthropic.Anthropic(api_key=api_key)
-    message = client.messages.create(
+        return st.secrets["anthropic"]["api_key"]
+    if "ANTHROPIC_API_KEY" in st.secrets:
+        return st.secrets["ANTHROPIC_API_KEY"]
+    available = list(st.secrets.keys())
+    raise KeyError(
+        f"Anthropic API key not found. Available secret keys: {available}. "
+        "Add ANTHROPIC_API_KEY = \"sk-ant-...\" to your Streamlit secrets."
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _anthropic_client(api_key: str) -> anthropic.Anthropic:
+    """One client (and connection pool) per API key, reused across reruns."""
+    return anthropic.Anthropic(api_key=api_key)
+
+
+def get_anthropic_client() -> anthropic.Anthropic:
+    # Keyed on the secret itself, so a rotated key gets a fresh client
+    return _anthropic_client(_get_anthropic_key())
+
+
+def _extract_with_tool(
+    content: list[dict],
+    tool: dict,
+    max_tokens: int,
+    on_progress=None,
+) -> dict:
+    """Send `content` to Claude (EXTRACTION_PROMPT as system) and return the forced tool input.
+
+    The response is streamed; `on_progress` (optional) is called with the
+    partially parsed tool input each time more of it arrives.
+    """
+    with get_anthropic_client().messages.stream(
         model="claude-haiku-4-5-20251001",
-        max_tokens=4096,
-        messages=[{"role": "user", "content": EXTRACTION_PROMPT + "\n\n" + article_text}],
+        max_tokens=max_tokens,
+        tools=[tool],
+        tool_choice={"type": "tool", "name": tool["name"]},
+        # Fixed instructions are a cacheable prefix; only the article varies
+        system=[{"type": "text", "text": EXTRACTION_PROMPT, "cache_control": {"type": "ephemeral"}}],
+        messages=[{"role": "user", "content": content}],
+    ) as stream:
+        if on_progress:
+            for event in stream:
+                if event.type == "input_json":
+                    on_progress(event.snapshot)
+        message = stream.get_final_message()
+    if message.stop_reason == "max_tokens":
+        raise ValueError("Claude's response was cut off before all picks were returned.")
+    return next(b.input for b in message.content if b.type == "tool_use")
+
+
+def call_claude(article_text: str, on_progress=None) -> dict:
+    return _extract_with_tool(
+        [{"type": "text", "text": truncate_article(article_text)}],
+        EXTRACTION_TOOL,
+        max_tokens=OUTPUT_TOKENS_PER_ARTICLE,
+        on_progress=on_progress,
     )
-    raw = message.content[0].text.strip()
-    # Strip markdown code fences if the model wraps output anyway
-    if raw.startswith("```"):
-        parts = raw.split("```")
-        raw = parts[1]
-        if raw.startswith("json"):
-            raw = raw[4:]
-    return json.loads(raw.strip())
-
-
-def fuzzy_match(name: str, aliases: list[dict]) -> tuple[str | None, int]:
-    """Return (best_canonical_name, score 0-100) against the aliases table."""
-    if not aliases:
-        return None, 0
-    alias_to_canonical = {a["alias"]: a["canonical_name"] for a in aliases}
-    for a in aliases:
-        alias_to_canonical[a["canonical_name"]] = a["canonical_name"]
-    result = process.extractOne(name, list(alias_to_canonical.keys()), scorer=fuzz.WRatio)
-    if result:
-        return alias_to_canonical[result[0]], int(result[1])
-    return None, 0
+
+
+def call_claude_batch(articles: list[dict], on_progress=None) -> dict:
+    """Extract picks from several articles in one request.
+
+    The per-article results are merged into the single-article shape used by the
+    review stage; each analyst carries the source_url and platform of its article.
+    """
+    if len(articles) > MAX_BATCH_ARTICLES:
+        raise ValueError(f"At most {MAX_BATCH_ARTICLES} articles can be extracted in one batch.")
+    # One content block per header and article body, so no article text is copied
+    # into a combined string before the SDK serialises the request.
+    blocks = [{"type": "text", "text": BATCH_INSTRUCTIONS}]
+    for i, a in enumerate(articles, 1):
+        blocks.append({"type": "text", "text": f"=== ARTICLE {i} (url={a['url']}) ==="})
+        blocks.append({"type": "text", "text": truncate_article(a["text"])})
+    result = _extract_with_tool(
+        blocks,
+        BATCH_EXTRACTION_TOOL,
+        max_tokens=OUTPUT_TOKENS_PER_ARTICLE * len(articles),
+        on_progress=on_progress,
+    )
+    analysts = []
+    for article in result.get("articles", []):
+        for analyst in article.get("analysts", []):
+            analysts.append(
+                {**analyst, "source_url": article.get("url"), "platform": article.get("platform")}
+            )
+    locations = [a["event_location"] for a in result.get("articles", []) if a.get("event_location")]
+    return {
+        "article_type": "batch",
+        "platform": None,
+        "event_location": locations[0] if locations else None,
+        "analysts": analysts,
+    }
+
+
+def text_hash(*parts: str) -> str:
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+
+# Re-running extraction on the same article(s) is a cache hit, not another API call.
+# Results are kept in a shared store rather than st.cache_data: the progress
+# callback draws into the page, and cache_data would try to replay that on a hit.
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _extraction_store() -> dict[str, dict]:
+    return {}
+
+
+def _extract_once(key: str, extract) -> dict:
+    store = _extraction_store()
+    if key not in store:
+        store[key] = extract()
+    # Callers normalize the result in place; keep the stored one untouched
+    return copy.deepcopy(store[key])
+
+
+def extract_cached(key: str, article_text: str, on_progress=None) -> dict:
+    return _extract_once(key, lambda: call_claude(article_text, on_progress=on_progress))
+
+
+def extract_batch_cached(key: str, articles: list[dict], on_progress=None) -> dict:
+    return _extract_once(key, lambda: call_claude_batch(articles, on_progress=on_progress))
+
+
+# Every pick field the review stage reads, with the value used when Claude omits it
+_PICK_DEFAULTS = {
+    "fighter_a": "",
+    "fighter_b": "",
+    "weight_class": "",
+    "picked_fighter": "",
+    "method_prediction": "",
+    "confidence_tag": "lean",
+    "reasoning_notes": "",
+    "nickname_used": "",
+    "alt_spelling_note": "",
+    "flag_for_review": False,
+}
+
+
+def normalize_extracted(extracted: dict) -> dict:
+    """Fill in every pick field once, so reruns of the review stage can index directly."""
+    analysts = extracted.get("analysts") or []
+    for analyst in analysts:
+        analyst["picks"] = [
+            {
+                **_PICK_DEFAULTS,
+                **{k: v for k, v in pick.items() if v is not None},
+                "method_prediction": normalize_method(pick.get("method_prediction")),
+            }
+            for pick in analyst.get("picks") or []
+        ]
+    return {**extracted, "analysts": analysts}
+
+
+def progress_reporter(placeholder):
+    """Return an on_progress callback that shows the running pick count in `placeholder`."""
+    last_count = -1
+
+    def report(snapshot: dict) -> None:
+        nonlocal last_count
+        # Batch responses nest analysts under "articles"; single ones don't
+        articles = snapshot.get("articles") or [snapshot]
+        count = sum(
+            len(analyst.get("picks") or [])
+            for article in articles
+            for analyst in article.get("analysts") or []
+        )
+        if count != last_count:
+            last_count = count
+            placeholder.caption(f"Received {count} pick(s) so far…")
+
+    return report
+
+
+class AliasIndex:
+    """Fuzzy-matchable view of the fighter_aliases table.
+
+    Choices (aliases + canonical names, deduped) are pre-processed once so each
+    lookup only has to normalize the query string. Results are memoized per
+    name, so a fighter who appears in many picks (or across reruns) is scored
+    once for this alias set.
+    """
+
+    def __init__(self, aliases: list[dict]):
+        alias_to_canonical = {a["alias"]: a["canonical_name"] for a in aliases}
+        for a in aliases:
+            alias_to_canonical[a["canonical_name"]] = a["canonical_name"]
+        self.choices = list(alias_to_canonical.keys())
+        self.canon = list(alias_to_canonical.values())
+        self._processed = [default_process(c) for c in self.choices]
+        self._exact = get_alias_index()
+        self._resolved: dict[str, tuple[str | None, int]] = {}
+
+    def lookup_many(self, names: list[str]) -> dict[str, tuple[str | None, int]]:
+        """Resolve many names at once with a single vectorized cdist pass."""
+        if not self.choices:
+            return {n: (None, 0) for n in names}
+        missing = []
+        for n in dict.fromkeys(names):
+            if n in self._resolved:
+                continue
+            # Exact (case-insensitive) alias hits skip rapidfuzz entirely
+            exact = self._exact.get(n.strip().casefold())
+            if exact:
+                self._resolved[n] = (exact, 100)
+            else:
+                missing.append(n)
+        if missing:
+            self._score(missing)
+        return {n: self._resolved[n] for n in names}
+
+    def _score(self, names: list[str]) -> None:
+        scores = process.cdist(
+            [default_process(n) for n in names],
+            self._processed,
+            # WRatio's partial scorers let surname- or first-name-only mentions
+            # ("Adesanya", "Khabib") still reach the full name; token_sort_ratio
+            # scores those far below the threshold or not at all.
+            scorer=fuzz.WRatio,
+            processor=None,
+            # Pruning cutoff: anything below can't be offered as "closest match"
+            score_cutoff=max(0, FUZZY_THRESHOLD - 15),
+            dtype=np.uint8,
+            workers=-1,
+        )
+        best = scores.argmax(axis=1)
+        for name, idx, row in zip(names, best, scores):
+            score = int(row[idx])
+            self._resolved[name] = (self.canon[idx], score) if score else (None, 0)
+
+
+# Only the current alias set is kept; a save produces a new key and the old
+# index (with its memoized lookups) is evicted instead of lingering in memory.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def build_alias_index(aliases: list[dict]) -> AliasIndex:
+    """Build the AliasIndex once per distinct set of alias rows."""
+    return AliasIndex(aliases)
+
+
+def collect_fighter_names(picks_lists: list[list[dict]]) -> list[str]:
+    """Unique fighter names across all picks, preferring current widget values."""
+    return sorted({
+        n
+        for ai, picks in enumerate(picks_lists)
+        for pi, pick in enumerate(picks)
+        for n in (
+            st.session_state.get(f"fa_{ai}_{pi}", pick["fighter_a"]),
+            st.session_state.get(f"fb_{ai}_{pi}", pick["fighter_b"]),
+            st.session_state.get(f"picked_{ai}_{pi}", pick["picked_fighter"]),
+        )
+        if n
+    })
+
+
+_USE_AS_IS = "Use as-is (treat as new fighter)"
+_ENTER_MANUALLY = "Enter canonical name manually"
+
+
+def map_option(canonical: str, score: int) -> str:
+    return f'Map to "{canonical}" ({score}%)'
+
+
+def collect_name_overrides(names: list[str], resolutions: dict) -> dict[str, str]:
+    """Name -> canonical for every unmatched name the user chose to map, from widget state."""
+    ss = st.session_state
+    overrides: dict[str, str] = {}
+    for name in names:
+        canonical, score = resolutions.get(name, (None, 100))
+        if score >= FUZZY_THRESHOLD:
+            continue
+        choice = ss.get(f"res_global_{name}")
+        if canonical and choice == map_option(canonical, score):
+            overrides[name] = canonical
+        elif choice == _ENTER_MANUALLY:
+            overrides[name] = ss[f"man_global_{name}"]
+        # else: use as-is, no entry in overrides
+    return overrides
+
+
+def collect_review_edits(analysts: list[dict], picks_lists: list[list[dict]]) -> list[dict]:
+    """Assemble the edited analysts and picks from widget state at save time."""
+    ss = st.session_state
+    analysts_data = []
+    for ai, analyst in enumerate(analysts):
+        picks_data = []
+        for pi in range(len(picks_lists[ai])):
+            picks_data.append(
+                {
+                    "fighter_a": ss[f"fa_{ai}_{pi}"],
+                    "fighter_b": ss[f"fb_{ai}_{pi}"],
+                    "weight_class": ss[f"wc_{ai}_{pi}"].strip() or None,
+                    "picked_fighter": ss[f"picked_{ai}_{pi}"],
+                    "method": ss[f"method_{ai}_{pi}"],
+                    "confidence": ss[f"conf_{ai}_{pi}"],
+                    "reasoning": ss[f"reasoning_{ai}_{pi}"],
+                    "tags": [t for t in _TAG_SPLIT.split(ss[f"tags_{ai}_{pi}"].strip()) if t],
+                }
+            )
+
+        analysts_data.append(
+            {
+                "analyst_name": ss[f"analyst_{ai}"],
+                "platform": ss.get(f"plat_{ai}", "").strip(),
+                "source_url": analyst.get("source_url"),
+                "picks": picks_data,
+            }
+        )
+    return analysts_data
+
+
+# Session keys written through set_state, so reset only touches our own state
+_OWNED_KEYS = "ing_owned_keys"
+
+
+def set_state(key: str, value) -> None:
+    """Set a page-owned session_state key and remember it for reset_session."""
+    st.session_state[key] = value
+    st.session_state.setdefault(_OWNED_KEYS, set()).add(key)
 
 
 def reset_session():
-    for k in list(st.session_state.keys()):
-        if k.startswith("ing_"):
-            del st.session_state[k]
+    for k in st.session_state.pop(_OWNED_KEYS, set()):
+        st.session_state.pop(k, None)
 
 
 # ── Page header ──────────────────────────────────────────────────────────────
 
 st.title("URL Ingestion")
-st.caption("Paste an article URL to extract analyst picks via AI.")
+st.caption("Paste an article URL (or several) to extract analyst picks via AI.")
 
 if "ing_stage" not in st.session_state:
-    st.session_state.ing_stage = "input"
+    set_state("ing_stage", "input")
 
 if st.session_state.ing_stage != "input":
     if st.button("↩ Start over", type="secondary"):
@@ -186,17 +577,48 @@ if st.session_state.ing_stage != "input":
 # STAGE: input — URL entry
 # ══════════════════════════════════════════════════════════════════════════════
 if st.session_state.ing_stage == "input":
+    batch_mode = st.toggle(
+        "Multiple URLs",
+        help="Scrape several articles and extract all their picks in a single AI call.",
+    )
+
+if st.session_state.ing_stage == "input" and batch_mode:
+    urls_raw = st.text_area("Article URLs (one per line)", height=150, placeholder="https://...")
+    urls = list(dict.fromkeys(u.strip() for u in urls_raw.splitlines() if u.strip()))
+    too_many = len(urls) > MAX_BATCH_ARTICLES
+    if too_many:
+        st.warning(f"Up to {MAX_BATCH_ARTICLES} URLs per batch — split the rest into another run.")
+    if st.button("Scrape all", type="primary", disabled=not urls or too_many):
+        articles, failed = [], []
+        with st.spinner(f"Scraping {len(urls)} article(s)…"):
+            for u in urls:
+                text = scrape_url(u)
+                if text:
+                    articles.append({"url": u, "text": text})
+                else:
+                    failed.append(u)
+        if articles:
+            set_state("ing_articles", articles)
+            set_state("ing_failed_urls", failed)
+            set_state("ing_url", "")
+            set_state("ing_article_text", "")
+            set_state("ing_stage", "text_ready")
+            st.rerun()
+        else:
+            st.error("None of these URLs could be scraped. Use single-URL mode to paste article text.")
+
+elif st.session_state.ing_stage == "input":
     url = st.text_input("Article URL", placeholder="https://...")
     if st.button("Scrape", type="primary", disabled=not url):
         with st.spinner("Scraping article…"):
             text = scrape_url(url)
-        st.session_state.ing_url = url
+        set_state("ing_url", url)
         if text:
-            st.session_state.ing_article_text = text
-            st.session_state.ing_stage = "text_ready"
+            set_state("ing_article_text", text)
+            set_state("ing_stage", "text_ready")
         else:
-            st.session_state.ing_article_text = ""
-            st.session_state.ing_stage = "paste_fallback"
+            set_state("ing_article_text", "")
+            set_state("ing_stage", "paste_fallback")
         st.rerun()
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -209,13 +631,40 @@ elif st.session_state.ing_stage == "paste_fallback":
     )
     pasted = st.text_area("Article text", height=300, placeholder="Paste article text here…")
     if st.button("Use this text →", type="primary", disabled=not pasted):
-        st.session_state.ing_article_text = pasted
-        st.session_state.ing_stage = "text_ready"
+        set_state("ing_article_text", pasted)
+        set_state("ing_stage", "text_ready")
         st.rerun()
 
 # ══════════════════════════════════════════════════════════════════════════════
 # STAGE: text_ready — preview scraped text and trigger extraction
 # ══════════════════════════════════════════════════════════════════════════════
+elif st.session_state.ing_stage == "text_ready" and st.session_state.get("ing_articles"):
+    articles = st.session_state.ing_articles
+    st.success(
+        f"{len(articles)} article(s) ready — "
+        f"{sum(len(a['text']) for a in articles):,} characters in total"
+    )
+    for failed_url in st.session_state.get("ing_failed_urls", []):
+        st.warning(f"Could not scrape **{failed_url}** — it was skipped.")
+    with st.expander("Articles"):
+        for a in articles:
+            st.markdown(f"- {a['url']} ({len(a['text']):,} characters)")
+
+    if st.button("Extract picks with AI ✨", type="primary"):
+        progress = st.empty()
+        with st.spinner("Calling Claude Haiku — this can take a little while for several articles…"):
+            try:
+                extracted = extract_batch_cached(
+                    text_hash(*(part for a in articles for part in (a["url"], a["text"]))),
+                    articles,
+                    on_progress=progress_reporter(progress),
+                )
+                set_state("ing_extracted", normalize_extracted(extracted))
+                set_state("ing_stage", "review_picks")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Extraction failed: {e}")
+
 elif st.session_state.ing_stage == "text_ready":
     char_count = len(st.session_state.ing_article_text)
     st.success(f"Article ready — {char_count:,} characters")
@@ -224,13 +673,24 @@ elif st.session_state.ing_stage == "text_ready":
         if char_count > 3000:
             preview += "\n\n[… truncated for preview …]"
         st.text(preview)
+    if char_count > MAX_INPUT_CHARS:
+        st.caption(
+            f"Long article — only the first and last ~{MAX_INPUT_CHARS // 2:,} characters "
+            "will be sent to Claude."
+        )
 
     if st.button("Extract picks with AI ✨", type="primary"):
+        progress = st.empty()
         with st.spinner("Calling Claude Haiku — this takes a few seconds…"):
             try:
-                extracted = call_claude(st.session_state.ing_article_text)
-                st.session_state.ing_extracted = extracted
-                st.session_state.ing_stage = "review_picks"
+                article_text = st.session_state.ing_article_text
+                extracted = extract_cached(
+                    text_hash(article_text),
+                    article_text,
+                    on_progress=progress_reporter(progress),
+                )
+                set_state("ing_extracted", normalize_extracted(extracted))
+                set_state("ing_stage", "review_picks")
                 st.rerun()
             except Exception as e:
                 st.error(f"Extraction failed: {e}")
@@ -241,9 +701,11 @@ elif st.session_state.ing_stage == "text_ready":
 elif st.session_state.ing_stage == "review_picks":
     extracted = st.session_state.ing_extracted
     aliases = get_fighter_aliases()
+    alias_index = build_alias_index(aliases)
 
-    analysts = extracted.get("analysts", [])
-    total_picks = sum(len(a.get("picks", [])) for a in analysts)
+    analysts = extracted["analysts"]
+    picks_lists = [a["picks"] for a in analysts]
+    total_picks = sum(map(len, picks_lists))
 
     st.subheader("Review Extracted Picks")
     st.caption(
@@ -251,6 +713,13 @@ elif st.session_state.ing_stage == "review_picks":
         f"**{total_picks}** pick(s) across **{len(analysts)}** analyst(s)"
     )
 
+    # Aliases are cached for 5 min in utils.db; let the user force a re-fetch
+    if st.button("↻ Refresh aliases", type="secondary", help="Re-load fighter aliases from the database."):
+        get_fighter_aliases.clear()
+        get_alias_index.clear()
+        st.session_state.pop("ing_resolutions", None)
+        st.rerun()
+
     # ── Event metadata ────────────────────────────────────────────────────────
     st.markdown("#### Event details")
     ec1, ec2 = st.columns(2)
@@ -285,149 +754,168 @@ elif st.session_state.ing_stage == "review_picks":
 
     st.divider()
 
-    # Collect edits in a list we'll walk when saving
-    analysts_data = []
-
-    for ai, analyst in enumerate(analysts):
-        st.markdown(f"### Analyst: {analyst.get('analyst_name', '')}")
-        analyst_name_edit = st.text_input(
-            "Analyst name",
-            value=analyst.get("analyst_name", ""),
-            key=f"analyst_{ai}",
+    # Names are scored in one batch when the stage opens and again only when the
+    # form is submitted, so edits don't trigger fuzzy matching on every rerun.
+    if "ing_resolutions" not in st.session_state:
+        set_state(
+            "ing_resolutions",
+            alias_index.lookup_many(collect_fighter_names(picks_lists)) if aliases else {},
         )
-
-        picks_data = []
-        for pi, pick in enumerate(analyst.get("picks", [])):
-            with st.container(border=True):
-                if pick.get("flag_for_review"):
-                    st.error("🚩 AI flagged this pick — it could not determine the winner confidently.")
-
-                if pick.get("nickname_used"):
-                    st.info(f"Nickname detected: **{pick['nickname_used']}**")
-                if pick.get("alt_spelling_note"):
-                    st.info(f"Spelling note: {pick['alt_spelling_note']}")
-
-                c1, c2, c3 = st.columns([3, 3, 2])
-                with c1:
-                    fa = st.text_input(
-                        "Fighter A", value=pick.get("fighter_a", ""), key=f"fa_{ai}_{pi}"
-                    )
-                with c2:
-                    fb = st.text_input(
-                        "Fighter B", value=pick.get("fighter_b", ""), key=f"fb_{ai}_{pi}"
-                    )
-                with c3:
-                    weight_class = st.text_input(
-                        "Weight class",
-                        value=pick.get("weight_class") or "",
-                        placeholder="e.g. Lightweight",
-                        key=f"wc_{ai}_{pi}",
-                    )
-
-                picked = st.text_input(
-                    "Picked to win",
-                    value=pick.get("picked_fighter") or "",
-                    key=f"picked_{ai}_{pi}",
+    resolutions = st.session_state.ing_resolutions
+    names_stale = False
+
+    with st.form("picks_form", clear_on_submit=False, border=False):
+        # Widgets only render here; values are read back from session_state
+        # by collect_review_edits when saving.
+        for ai, analyst in enumerate(analysts):
+            st.markdown(f"### Analyst: {analyst.get('analyst_name', '')}")
+            st.text_input(
+                "Analyst name",
+                value=analyst.get("analyst_name", ""),
+                key=f"analyst_{ai}",
+            )
+            if analyst.get("source_url"):
+                st.caption(f"Source: {analyst['source_url']}")
+                st.text_input(
+                    "Platform / Publication for this article",
+                    value=analyst.get("platform") or "",
+                    help="Leave blank to use the platform entered above.",
+                    key=f"plat_{ai}",
                 )
 
-                c4, c5 = st.columns(2)
-                with c4:
-                    raw_method = normalize_method(pick.get("method_prediction"))
-                    method_idx = METHOD_OPTIONS.index(raw_method) if raw_method in METHOD_OPTIONS else 0
-                    method = st.selectbox(
-                        "Method prediction",
-                        METHOD_OPTIONS,
-                        index=method_idx,
-                        key=f"method_{ai}_{pi}",
+            for pi, pick in enumerate(picks_lists[ai]):
+                with st.container(border=True):
+                    if pick["flag_for_review"]:
+                        st.error("🚩 AI flagged this pick — it could not determine the winner confidently.")
+
+                    if pick["nickname_used"]:
+                        st.info(f"Nickname detected: **{pick['nickname_used']}**")
+                    if pick["alt_spelling_note"]:
+                        st.info(f"Spelling note: {pick['alt_spelling_note']}")
+
+                    c1, c2, c3 = st.columns([3, 3, 2])
+                    with c1:
+                        fa = st.text_input(
+                            "Fighter A", value=pick["fighter_a"], key=f"fa_{ai}_{pi}"
+                        )
+                    with c2:
+                        fb = st.text_input(
+                            "Fighter B", value=pick["fighter_b"], key=f"fb_{ai}_{pi}"
+                        )
+                    with c3:
+                        st.text_input(
+                            "Weight class",
+                            value=pick["weight_class"],
+                            placeholder="e.g. Lightweight",
+                            key=f"wc_{ai}_{pi}",
+                        )
+
+                    picked = st.text_input(
+                        "Picked to win",
+                        value=pick["picked_fighter"],
+                        key=f"picked_{ai}_{pi}",
                     )
-                with c5:
-                    raw_conf = pick.get("confidence_tag") or "lean"
-                    conf_idx = (
-                        CONFIDENCE_OPTIONS.index(raw_conf)
-                        if raw_conf in CONFIDENCE_OPTIONS
-                        else 0
+
+                    c4, c5 = st.columns(2)
+                    with c4:
+                        raw_method = pick["method_prediction"]
+                        method_idx = _METHOD_INDEX.get(raw_method, 0)
+                        st.selectbox(
+                            "Method prediction",
+                            METHOD_OPTIONS,
+                            index=method_idx,
+                            key=f"method_{ai}_{pi}",
+                        )
+                    with c5:
+                        raw_conf = pick["confidence_tag"]
+                        conf_idx = _CONF_INDEX.get(raw_conf, 0)
+                        st.selectbox(
+                            "Confidence",
+                            CONFIDENCE_OPTIONS,
+                            index=conf_idx,
+                            key=f"conf_{ai}_{pi}",
+                        )
+
+                    st.text_area(
+                        "Reasoning notes",
+                        value=pick["reasoning_notes"],
+                        height=80,
+                        key=f"reasoning_{ai}_{pi}",
                     )
-                    confidence = st.selectbox(
-                        "Confidence",
-                        CONFIDENCE_OPTIONS,
-                        index=conf_idx,
-                        key=f"conf_{ai}_{pi}",
+
+                    st.text_input(
+                        "Tags (comma-separated)",
+                        value="",
+                        placeholder="e.g. grappling-edge, title-fight",
+                        key=f"tags_{ai}_{pi}",
                     )
 
-                reasoning = st.text_area(
-                    "Reasoning notes",
-                    value=pick.get("reasoning_notes") or "",
-                    height=80,
-                    key=f"reasoning_{ai}_{pi}",
+                    # Edited names need a fresh lookup before they can be resolved
+                    if aliases:
+                        for name in sorted({n for n in (fa, fb, picked) if n} - resolutions.keys()):
+                            names_stale = True
+                            st.caption(
+                                f"**{name}** was edited — click **Resolve names** to re-check it."
+                            )
+
+        # ── Fighter name resolution: once per unique name across the article ──
+        unmatched = [
+            n for n in collect_fighter_names(picks_lists)
+            if n in resolutions and resolutions[n][1] < FUZZY_THRESHOLD
+        ]
+        if unmatched:
+            st.markdown("### Fighter names to check")
+        for name in unmatched:
+            canonical, score = resolutions[name]
+            with st.expander(
+                f"⚠️ Name not confidently matched: **{name}**"
+                + (f" (closest: '{canonical}', {score}%)" if canonical else ""),
+                # No candidate at all: default is the new-fighter path
+                expanded=bool(canonical),
+            ):
+                opts = [_USE_AS_IS]
+                if canonical:
+                    opts.append(map_option(canonical, score))
+                opts.append(_ENTER_MANUALLY)
+
+                st.radio(
+                    "What should we do with this name?",
+                    opts,
+                    key=f"res_global_{name}",
+                    horizontal=True,
                 )
-
-                tags_raw = st.text_input(
-                    "Tags (comma-separated)",
-                    value="",
-                    placeholder="e.g. grappling-edge, title-fight",
-                    key=f"tags_{ai}_{pi}",
+                # Always rendered: inside a form a conditional widget
+                # would only appear after the next submit.
+                st.text_input(
+                    "Canonical name (if entering manually)",
+                    value=name,
+                    key=f"man_global_{name}",
                 )
 
-                # ── Fighter name resolution ───────────────────────────────
-                name_overrides: dict[str, str] = {}
-
-                if aliases:
-                    names_to_check = {n for n in [fa, fb, picked] if n}
-                    for name in sorted(names_to_check):
-                        canonical, score = fuzzy_match(name, aliases)
-                        if score < FUZZY_THRESHOLD:
-                            with st.expander(
-                                f"⚠️ Name not confidently matched: **{name}**"
-                                + (f" (closest: '{canonical}', {score}%)" if canonical else ""),
-                                expanded=True,
-                            ):
-                                opts = ["Use as-is (treat as new fighter)"]
-                                if canonical:
-                                    opts.append(f'Map to "{canonical}" ({score}%)')
-                                opts.append("Enter canonical name manually")
-
-                                choice = st.radio(
-                                    "What should we do with this name?",
-                                    opts,
-                                    key=f"res_{ai}_{pi}_{name}",
-                                    horizontal=True,
-                                )
-
-                                if canonical and choice == f'Map to "{canonical}" ({score}%)':
-                                    name_overrides[name] = canonical
-                                elif choice == "Enter canonical name manually":
-                                    manual = st.text_input(
-                                        "Canonical name",
-                                        value=name,
-                                        key=f"man_{ai}_{pi}_{name}",
-                                    )
-                                    name_overrides[name] = manual
-                                # else: use as-is, no entry in overrides
-
-                picks_data.append(
-                    {
-                        "fighter_a": fa,
-                        "fighter_b": fb,
-                        "weight_class": weight_class.strip() or None,
-                        "picked_fighter": picked,
-                        "method": method,
-                        "confidence": confidence,
-                        "reasoning": reasoning,
-                        "tags": [t.strip() for t in tags_raw.split(",") if t.strip()],
-                        "name_overrides": name_overrides,
-                    }
-                )
+        st.divider()
 
-        analysts_data.append({"analyst_name": analyst_name_edit, "picks": picks_data})
+        save_disabled = not event_name.strip()
+        if save_disabled:
+            st.caption("Enter an event name above to enable saving.")
 
-    st.divider()
+        fc1, fc2 = st.columns(2)
+        with fc1:
+            resolve_clicked = st.form_submit_button("🔎 Resolve names")
+        with fc2:
+            save_clicked = st.form_submit_button(
+                "💾 Save all picks", type="primary", disabled=save_disabled
+            )
 
-    save_disabled = not event_name.strip()
-    if save_disabled:
-        st.caption("Enter an event name above to enable saving.")
+    if resolve_clicked:
+        set_state(
+            "ing_resolutions",
+            alias_index.lookup_many(collect_fighter_names(picks_lists)) if aliases else {},
+        )
+        st.rerun()
 
-    if st.button("💾 Save all picks", type="primary", disabled=save_disabled):
-        saved_count = 0
+    if save_clicked and names_stale:
+        st.warning("Some fighter names changed since they were last checked. Click **Resolve names** before saving.")
+    elif save_clicked:
         try:
             event_id = get_or_create_event(
                 name=event_name.strip(),
@@ -435,40 +923,43 @@ elif st.session_state.ing_stage == "review_picks":
                 location=event_location.strip() or None,
             )
 
-            for analyst in analysts_data:
-                for pick in analyst["picks"]:
-                    overrides = pick["name_overrides"]
+            # Resolve names, then hand every pick to save_picks_bulk so the
+            # number of requests doesn't grow with the number of picks.
+            overrides = collect_name_overrides(collect_fighter_names(picks_lists), resolutions)
+            # Persist any new aliases the user chose to map
+            save_aliases_bulk([(canon, orig) for orig, canon in overrides.items() if orig != canon])
 
-                    fa = overrides.get(pick["fighter_a"], pick["fighter_a"])
-                    fb = overrides.get(pick["fighter_b"], pick["fighter_b"])
+            bulk_picks = []
+            for analyst in collect_review_edits(analysts, picks_lists):
+                for pick in analyst["picks"]:
                     picked = overrides.get(pick["picked_fighter"], pick["picked_fighter"])
+                    bulk_picks.append(
+                        {
+                            "fighter_a": overrides.get(pick["fighter_a"], pick["fighter_a"]),
+                            "fighter_b": overrides.get(pick["fighter_b"], pick["fighter_b"]),
+                            "weight_class": pick["weight_class"],
+                            "tags": pick["tags"],
+                            "analyst_name": analyst["analyst_name"],
+                            "platform": analyst["platform"] or article_platform.strip() or None,
+                            "source_url": analyst["source_url"] or st.session_state.get("ing_url", ""),
+                            "picked_fighter": picked or None,
+                            "method_prediction": pick["method"] or None,
+                            "confidence_tag": pick["confidence"],
+                            "reasoning_notes": pick["reasoning"] or None,
+                        }
+                    )
 
-                    # Persist any new aliases the user chose to map
-                    for orig, canon in overrides.items():
-                        if orig != canon:
-                            save_alias(canon, orig)
+            bar = st.progress(0.0)
+            saved_count = save_picks_bulk(
+                event_id, bulk_picks, on_progress=lambda frac, label: bar.progress(frac, text=label)
+            )
 
-                    fight_id = get_or_create_fight(
-                        event_id, fa, fb, weight_class=pick["weight_class"]
-                    )
+            # Let the chat page see the new picks straight away
+            clear_query_cache()
 
-                    pick_row = {
-                        "fight_id": fight_id,
-                        "analyst_name": analyst["analyst_name"],
-                        "platform": article_platform.strip() or None,
-                        "source_url": st.session_state.get("ing_url", ""),
-                        "picked_fighter": picked or None,
-                        "method_prediction": pick["method"] or None,
-                        "confidence_tag": pick["confidence"],
-                        "reasoning_notes": pick["reasoning"] or None,
-                    }
-                    pick_id = save_analyst_pick(pick_row)
-                    save_pick_tags(pick_id, pick["tags"])
-                    saved_count += 1
-
-            st.session_state.ing_saved_count = saved_count
-            st.session_state.ing_saved_event = event_name.strip()
-            st.session_state.ing_stage = "done"
+            set_state("ing_saved_count", saved_count)
+            set_state("ing_saved_event", event_name.strip())
+            set_state("ing_stage", "done")
             st.rerun()
 
         except Exception as e:
@@ -1,16 +1,36 @@
-import csv
 import io
 
+import pandas as pd
 import streamlit as st
 
 from utils.db import get_events, get_picks_for_event
 
 # Columns in the exact order the original ChatMMA app expects
 CHATMMA_COLUMNS = ["date", "analyst", "platform", "event", "location", "fight", "weight_class", "pick", "context"]
+# Extra columns stored in chatmmatracker but not in the original CSV format
+FULL_COLUMNS = CHATMMA_COLUMNS + ["method", "confidence"]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_picks(event_id: str) -> pd.DataFrame:
+    """All export columns for an event, as one frame shared by preview and CSVs."""
+    return pd.DataFrame(get_picks_for_event(event_id), columns=FULL_COLUMNS)
+
+
+def csv_bytes_for(df: pd.DataFrame, columns: list[str]) -> bytes:
+    """CSV bytes for the given columns of the (cached) picks frame."""
+    out = io.BytesIO()
+    df.to_csv(out, columns=columns, index=False, encoding="utf-8")
+    return out.getvalue()
+
 
 st.title("Export Picks")
 st.caption("Download picks as a CSV compatible with the original ChatMMA app.")
 
+if st.button("↻ Refresh", help="Re-read events and picks from the database."):
+    get_events.clear()
+    load_picks.clear()
+
 events = get_events()
 
 if not events:
@@ -21,29 +41,22 @@ event_options = {f"{e['name']} ({e['date'] or 'no date'})": e["event_id"] for e
 selected_label = st.selectbox("Select event", list(event_options.keys()))
 selected_event_id = event_options[selected_label]
 
-rows = get_picks_for_event(selected_event_id)
+picks_df = load_picks(selected_event_id)
 
-if not rows:
+if picks_df.empty:
     st.warning("No picks found for this event yet.")
     st.stop()
 
-st.success(f"**{len(rows)}** pick(s) found.")
+st.success(f"**{len(picks_df)}** pick(s) found.")
 
 # ── Preview table ─────────────────────────────────────────────────────────────
 with st.expander("Preview", expanded=True):
-    st.dataframe(
-        [{col: r[col] for col in CHATMMA_COLUMNS} for r in rows],
-        use_container_width=True,
-    )
+    st.dataframe(picks_df[CHATMMA_COLUMNS], use_container_width=True, hide_index=True)
 
 st.divider()
 
 # ── CSV download ──────────────────────────────────────────────────────────────
-buf = io.StringIO()
-writer = csv.DictWriter(buf, fieldnames=CHATMMA_COLUMNS, extrasaction="ignore")
-writer.writeheader()
-writer.writerows(rows)
-csv_bytes = buf.getvalue().encode("utf-8")
+csv_bytes = csv_bytes_for(picks_df, CHATMMA_COLUMNS)
 
 event_name_slug = selected_label.split(" (")[0].replace(" ", "_").lower()
 st.download_button(
@@ -62,12 +75,7 @@ st.caption(
 # ── Full export with extra columns ────────────────────────────────────────────
 with st.expander("Full export (includes method & confidence)"):
     st.caption("These extra columns are stored in chatmmatracker but not in the original CSV format.")
-    FULL_COLUMNS = CHATMMA_COLUMNS + ["method", "confidence"]
-    buf2 = io.StringIO()
-    writer2 = csv.DictWriter(buf2, fieldnames=FULL_COLUMNS, extrasaction="ignore")
-    writer2.writeheader()
-    writer2.writerows(rows)
-    csv_bytes2 = buf2.getvalue().encode("utf-8")
+    csv_bytes2 = csv_bytes_for(picks_df, FULL_COLUMNS)
 
     st.download_button(
         label="⬇️ Download full CSV",
@@ -6,8 +6,14 @@ Supports fight-specific questions, consensus picks, inside-distance picks,
 underdog analysis, and general MMA queries.
 """
 
+from collections import deque
+from itertools import chain
+
 import streamlit as st
 
+# Only the most recent messages are re-rendered on each rerun
+CHAT_WINDOW = 100
+
 # ── API key check ────────────────────────────────────────────────────────────
 
 def _get_api_key() -> str | None:
@@ -52,10 +58,23 @@ def _init_bot(key: str) -> ChatMMABot:
 
 bot = _init_bot(api_key)
 
+
+def _cost_caption(cost: dict) -> str:
+    if not cost["total_tokens"] and cost.get("counted_input_tokens"):
+        return f"Not sent: {cost['counted_input_tokens']:,} tokens counted, no charge"
+    caption = f"Cost: ${cost['cost_usd']:.5f} ({cost['total_tokens']:,} tokens"
+    if cost.get("cache_read_tokens"):
+        caption += f", {cost['cache_read_tokens']:,} from cache"
+    return caption + ")"
+
 # ── session state ─────────────────────────────────────────────────────────────
 
 if "chat_messages" not in st.session_state:
-    st.session_state.chat_messages = []
+    st.session_state.chat_messages = deque(maxlen=CHAT_WINDOW)
+
+# Full history, append-only; never iterated during render
+if "chat_messages_full" not in st.session_state:
+    st.session_state.chat_messages_full = []
 
 if "chat_total_cost" not in st.session_state:
     st.session_state.chat_total_cost = 0.0
@@ -90,53 +109,64 @@ with st.sidebar:
     st.divider()
 
     if st.button("Clear chat history"):
-        st.session_state.chat_messages = []
+        st.session_state.chat_messages = deque(maxlen=CHAT_WINDOW)
+        st.session_state.chat_messages_full = []
         st.session_state.chat_total_cost = 0.0
         st.session_state.chat_query_count = 0
         st.rerun()
 
 # ── message history ───────────────────────────────────────────────────────────
 
+if len(st.session_state.chat_messages_full) > CHAT_WINDOW:
+    st.caption(f"Showing the last {CHAT_WINDOW} messages.")
+
 for msg in st.session_state.chat_messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
         if msg["role"] == "assistant" and msg.get("cost"):
             cost = msg["cost"]
-            st.caption(
-                f"Cost: ${cost['cost_usd']:.5f} "
-                f"({cost['total_tokens']:,} tokens)"
-            )
+            st.caption(_cost_caption(cost))
 
 # ── input ─────────────────────────────────────────────────────────────────────
 
 if prompt := st.chat_input("Ask about any fight or event…"):
     # Show user message
-    st.session_state.chat_messages.append({"role": "user", "content": prompt})
+    user_msg = {"role": "user", "content": prompt}
+    st.session_state.chat_messages.append(user_msg)
+    st.session_state.chat_messages_full.append(user_msg)
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Get answer
+    # Get answer; Claude-backed answers stream in, canned replies are plain strings
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing predictions…"):
-            try:
+        # Holds the answer (or the error that replaces a half-streamed one)
+        placeholder = st.empty()
+        try:
+            with st.spinner("Analyzing predictions…"):
                 result = bot.answer_question(prompt)
                 answer = result["answer"]
                 cost = result.get("metadata", {}).get("cost_estimate")
-
-                st.markdown(answer)
-                if cost:
-                    st.caption(
-                        f"Cost: ${cost['cost_usd']:.5f} "
-                        f"({cost['total_tokens']:,} tokens)"
-                    )
-                    st.session_state.chat_total_cost += cost["cost_usd"]
-                st.session_state.chat_query_count += 1
-
-            except Exception as exc:
-                answer = f"Error: {exc}"
-                cost = None
-                st.error(answer)
-
-    st.session_state.chat_messages.append(
-        {"role": "assistant", "content": answer, "cost": cost}
-    )
+                if not isinstance(answer, str):
+                    # Keep the spinner up until Claude's first chunk arrives
+                    chunks = iter(answer)
+                    answer = chain([next(chunks, "")], chunks)
+
+            if isinstance(answer, str):
+                placeholder.markdown(answer)
+            else:
+                with placeholder.container():
+                    answer = st.write_stream(answer)
+            # Filled in by the bot once the stream has finished
+            if cost:
+                st.caption(_cost_caption(cost))
+                st.session_state.chat_total_cost += cost["cost_usd"]
+            st.session_state.chat_query_count += 1
+
+        except Exception as exc:
+            answer = f"Error: {exc}"
+            cost = None
+            placeholder.error(answer)
+
+    assistant_msg = {"role": "assistant", "content": answer, "cost": cost}
+    st.session_state.chat_messages.append(assistant_msg)
+    st.session_state.chat_messages_full.append(assistant_msg)
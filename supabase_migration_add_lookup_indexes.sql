@@ -0,0 +1,15 @@
+-- Migration: index the foreign keys the app reads picks and tags through
+-- Run this in your Supabase SQL Editor (Project > SQL Editor > New query)
+-- Safe to run multiple times (IF NOT EXISTS guard)
+--
+-- Postgres does not index foreign keys on its own. Both the export query
+-- (picks embedded under fights, tags under picks) and the chat page's
+-- analyst_picks.fight_id IN (...) / pick_tags.pick_id IN (...) reads filter
+-- on these columns. fights.event_id lookups are covered by the leading column
+-- of fights_event_pair_key (supabase_migration_get_or_create_rpc.sql).
+
+CREATE INDEX IF NOT EXISTS analyst_picks_fight_id_idx
+  ON analyst_picks (fight_id);
+
+CREATE INDEX IF NOT EXISTS pick_tags_pick_id_idx
+  ON pick_tags (pick_id);
@@ -0,0 +1,52 @@
+-- Migration: atomic get-or-create functions for events and fights
+-- Run this in your Supabase SQL Editor (Project > SQL Editor > New query)
+-- Safe to run multiple times (IF NOT EXISTS / OR REPLACE guards)
+--
+-- The unique indexes will fail to build if duplicates already exist
+-- (events differing only by case, or the same bout stored in both fighter
+-- orders for one event). Merge those rows first.
+
+-- One event per name, case-insensitive
+CREATE UNIQUE INDEX IF NOT EXISTS events_name_lower_key
+  ON events (lower(name));
+
+-- One fight per event and fighter pair, in either order
+CREATE UNIQUE INDEX IF NOT EXISTS fights_event_pair_key
+  ON fights (event_id, least(fighter_a, fighter_b), greatest(fighter_a, fighter_b));
+
+-- Return the event_id for `p_name`, creating the event if needed.
+-- Blank date/location on an existing event are filled in, never overwritten.
+CREATE OR REPLACE FUNCTION get_or_create_event(
+  p_name     text,
+  p_date     date DEFAULT NULL,
+  p_location text DEFAULT NULL
+) RETURNS uuid
+LANGUAGE sql AS $$
+  INSERT INTO events (name, date, location)
+  VALUES (p_name, p_date, p_location)
+  ON CONFLICT (lower(name)) DO UPDATE
+    SET date     = coalesce(events.date, excluded.date),
+        location = coalesce(events.location, excluded.location)
+  RETURNING event_id;
+$$;
+
+-- Return (fighter_a, fighter_b, fight_id) for each pair in `p_fights`
+-- (a JSON array of {fighter_a, fighter_b, weight_class}) at `p_event_id`,
+-- creating missing fights. Existing rows come back in their stored fighter
+-- order. Pairs listed in both orders are collapsed first, since ON CONFLICT
+-- can't touch the same row twice. A blank weight_class is filled in.
+CREATE OR REPLACE FUNCTION get_or_create_fights(
+  p_event_id uuid,
+  p_fights   jsonb
+) RETURNS TABLE (fighter_a text, fighter_b text, fight_id uuid)
+LANGUAGE sql AS $$
+  INSERT INTO fights AS f (event_id, fighter_a, fighter_b, weight_class)
+  SELECT DISTINCT ON (least(x.fighter_a, x.fighter_b), greatest(x.fighter_a, x.fighter_b))
+         p_event_id, x.fighter_a, x.fighter_b, nullif(x.weight_class, '')
+  FROM jsonb_to_recordset(p_fights) AS x(fighter_a text, fighter_b text, weight_class text)
+  ORDER BY least(x.fighter_a, x.fighter_b), greatest(x.fighter_a, x.fighter_b),
+           nullif(x.weight_class, '') NULLS LAST
+  ON CONFLICT (event_id, least(fighter_a, fighter_b), greatest(fighter_a, fighter_b)) DO UPDATE
+    SET weight_class = coalesce(f.weight_class, excluded.weight_class)
+  RETURNING f.fighter_a, f.fighter_b, f.fight_id;
+$$;
@@ -0,0 +1,53 @@
+-- Migration: save a batch of picks atomically
+-- Run this in your Supabase SQL Editor (Project > SQL Editor > New query)
+-- Safe to run multiple times (OR REPLACE guard)
+-- Requires supabase_migration_get_or_create_rpc.sql (get_or_create_fights).
+
+-- Save a batch of picks for p_event_id in one transaction: fights (via
+-- get_or_create_fights), then the picks, then their tags. p_picks is a JSON
+-- array of analyst_picks columns plus fighter_a, fighter_b, weight_class and
+-- tags. If any step fails nothing is written, so a retry can't duplicate picks.
+-- Returns the number of picks saved.
+create or replace function save_picks(
+  p_event_id uuid,
+  p_picks    jsonb
+) returns integer
+language plpgsql as $$
+declare
+  v_picks  jsonb;
+  v_fights jsonb;
+  v_count  integer;
+begin
+  -- Give each pick its id up front so its tags can reference it
+  select coalesce(jsonb_agg(p || jsonb_build_object('pick_id', uuid_generate_v4())), '[]'::jsonb)
+    into v_picks
+    from jsonb_array_elements(p_picks) as p;
+
+  select coalesce(jsonb_agg(f), '[]'::jsonb)
+    into v_fights
+    from get_or_create_fights(p_event_id, v_picks) as f;
+
+  insert into analyst_picks (
+    pick_id, fight_id, analyst_name, platform, source_url,
+    picked_fighter, method_prediction, confidence_tag, reasoning_notes
+  )
+  select x.pick_id, f.fight_id, x.analyst_name, x.platform, x.source_url,
+         x.picked_fighter, x.method_prediction, x.confidence_tag, x.reasoning_notes
+  from jsonb_to_recordset(v_picks) as x(
+         pick_id uuid, fighter_a text, fighter_b text, analyst_name text, platform text,
+         source_url text, picked_fighter text, method_prediction text,
+         confidence_tag text, reasoning_notes text)
+  join jsonb_to_recordset(v_fights) as f(fighter_a text, fighter_b text, fight_id uuid)
+    on (f.fighter_a = x.fighter_a and f.fighter_b = x.fighter_b)
+    or (f.fighter_a = x.fighter_b and f.fighter_b = x.fighter_a);
+  get diagnostics v_count = row_count;
+
+  insert into pick_tags (pick_id, tag)
+  select (p->>'pick_id')::uuid, btrim(t)
+  from jsonb_array_elements(v_picks) as p,
+       jsonb_array_elements_text(coalesce(p->'tags', '[]'::jsonb)) as t
+  where btrim(t) <> '';
+
+  return v_count;
+end;
+$$;
@@ -16,6 +16,7 @@ create table events (
   created_at timestamptz default now()
 );
 alter table events enable row level security;
+create unique index events_name_lower_key on events (lower(name));
 
 -- ─────────────────────────────────────────
 -- fights
@@ -32,6 +33,8 @@ create table fights (
               check (status in ('scheduled', 'completed', 'cancelled'))
 );
 alter table fights enable row level security;
+create unique index fights_event_pair_key
+  on fights (event_id, least(fighter_a, fighter_b), greatest(fighter_a, fighter_b));
 
 -- ─────────────────────────────────────────
 -- fighter_aliases
@@ -58,6 +61,7 @@ create table analyst_picks (
   created_at       timestamptz default now()
 );
 alter table analyst_picks enable row level security;
+create index analyst_picks_fight_id_idx on analyst_picks (fight_id);
 
 -- ─────────────────────────────────────────
 -- pick_tags
@@ -68,6 +72,7 @@ create table pick_tags (
   tag     text not null
 );
 alter table pick_tags enable row level security;
+create index pick_tags_pick_id_idx on pick_tags (pick_id);
 
 -- ─────────────────────────────────────────
 -- results
@@ -89,6 +94,97 @@ create table results (
 );
 alter table results enable row level security;
 
+-- ─────────────────────────────────────────
+-- write functions (called via rpc from utils/db.py)
+-- Their ON CONFLICT targets are events_name_lower_key and fights_event_pair_key.
+-- ─────────────────────────────────────────
+
+-- Return the event_id for p_name, creating the event if needed.
+-- Blank date/location on an existing event are filled in, never overwritten.
+create or replace function get_or_create_event(
+  p_name     text,
+  p_date     date default null,
+  p_location text default null
+) returns uuid
+language sql as $$
+  insert into events (name, date, location)
+  values (p_name, p_date, p_location)
+  on conflict (lower(name)) do update
+    set date     = coalesce(events.date, excluded.date),
+        location = coalesce(events.location, excluded.location)
+  returning event_id;
+$$;
+
+-- Return (fighter_a, fighter_b, fight_id) for each pair in p_fights
+-- (a JSON array of {fighter_a, fighter_b, weight_class}) at p_event_id,
+-- creating missing fights. Existing rows come back in their stored fighter
+-- order. Pairs listed in both orders are collapsed first, since on conflict
+-- can't touch the same row twice. A blank weight_class is filled in.
+create or replace function get_or_create_fights(
+  p_event_id uuid,
+  p_fights   jsonb
+) returns table (fighter_a text, fighter_b text, fight_id uuid)
+language sql as $$
+  insert into fights as f (event_id, fighter_a, fighter_b, weight_class)
+  select distinct on (least(x.fighter_a, x.fighter_b), greatest(x.fighter_a, x.fighter_b))
+         p_event_id, x.fighter_a, x.fighter_b, nullif(x.weight_class, '')
+  from jsonb_to_recordset(p_fights) as x(fighter_a text, fighter_b text, weight_class text)
+  order by least(x.fighter_a, x.fighter_b), greatest(x.fighter_a, x.fighter_b),
+           nullif(x.weight_class, '') nulls last
+  on conflict (event_id, least(fighter_a, fighter_b), greatest(fighter_a, fighter_b)) do update
+    set weight_class = coalesce(f.weight_class, excluded.weight_class)
+  returning f.fighter_a, f.fighter_b, f.fight_id;
+$$;
+
+-- Save a batch of picks for p_event_id in one transaction: fights (via
+-- get_or_create_fights), then the picks, then their tags. p_picks is a JSON
+-- array of analyst_picks columns plus fighter_a, fighter_b, weight_class and
+-- tags. If any step fails nothing is written, so a retry can't duplicate picks.
+-- Returns the number of picks saved.
+create or replace function save_picks(
+  p_event_id uuid,
+  p_picks    jsonb
+) returns integer
+language plpgsql as $$
+declare
+  v_picks  jsonb;
+  v_fights jsonb;
+  v_count  integer;
+begin
+  -- Give each pick its id up front so its tags can reference it
+  select coalesce(jsonb_agg(p || jsonb_build_object('pick_id', uuid_generate_v4())), '[]'::jsonb)
+    into v_picks
+    from jsonb_array_elements(p_picks) as p;
+
+  select coalesce(jsonb_agg(f), '[]'::jsonb)
+    into v_fights
+    from get_or_create_fights(p_event_id, v_picks) as f;
+
+  insert into analyst_picks (
+    pick_id, fight_id, analyst_name, platform, source_url,
+    picked_fighter, method_prediction, confidence_tag, reasoning_notes
+  )
+  select x.pick_id, f.fight_id, x.analyst_name, x.platform, x.source_url,
+         x.picked_fighter, x.method_prediction, x.confidence_tag, x.reasoning_notes
+  from jsonb_to_recordset(v_picks) as x(
+         pick_id uuid, fighter_a text, fighter_b text, analyst_name text, platform text,
+         source_url text, picked_fighter text, method_prediction text,
+         confidence_tag text, reasoning_notes text)
+  join jsonb_to_recordset(v_fights) as f(fighter_a text, fighter_b text, fight_id uuid)
+    on (f.fighter_a = x.fighter_a and f.fighter_b = x.fighter_b)
+    or (f.fighter_a = x.fighter_b and f.fighter_b = x.fighter_a);
+  get diagnostics v_count = row_count;
+
+  insert into pick_tags (pick_id, tag)
+  select (p->>'pick_id')::uuid, btrim(t)
+  from jsonb_array_elements(v_picks) as p,
+       jsonb_array_elements_text(coalesce(p->'tags', '[]'::jsonb)) as t
+  where btrim(t) <> '';
+
+  return v_count;
+end;
+$$;
+
 -- ─────────────────────────────────────────
 -- NOTE ON SECURITY
 -- RLS is enabled on all tables above.
@@ -13,9 +13,14 @@ Schema mapping (ChatMMA original → ChatMMAPicks Supabase):
   analysts.accuracy_rate                     → not yet tracked (defaults to 0)
 """
 
+import heapq
 import re
 from collections import Counter
+from collections.abc import Iterator
+from operator import itemgetter
+from types import SimpleNamespace
 
+import numpy as np
 import streamlit as st
 from anthropic import Anthropic
 from rapidfuzz import fuzz, process
@@ -23,6 +28,146 @@ from rapidfuzz import fuzz, process
 from utils.db import get_supabase
 
 
+# Most entries each event prompt lists. The aggregators cap their lists at these
+# with heapq.nlargest, so nothing past the cut is carried around or stringified.
+MAX_CONSENSUS_PICKS = 15
+MAX_INSIDE_DISTANCE_PICKS = 10
+MAX_UNDERDOG_PICKS = 8
+
+# Prompts above this are refused rather than sent
+MAX_INPUT_TOKENS = 50_000
+
+
+class PromptTooLargeError(Exception):
+    """A prompt was counted at over MAX_INPUT_TOKENS and not sent."""
+
+    def __init__(self, input_tokens: int, model: str):
+        super().__init__(f"Prompt too large ({input_tokens:,} tokens, limit {MAX_INPUT_TOKENS:,})")
+        self.input_tokens = input_tokens
+        self.model = model
+
+# Model per query type; anything not listed uses ChatMMABot.model.
+# General questions need no pick data or deep reasoning, so they go to Haiku.
+MODEL_BY_QUERY_TYPE = {
+    "general": "claude-haiku-4-5-20251001",
+}
+
+# USD per million (input, output) tokens. Cache reads bill at 0.1x the input
+# rate and cache writes at 1.25x.
+MODEL_PRICING = {
+    "claude-sonnet-4-6": (3.0, 15.0),
+    "claude-haiku-4-5-20251001": (1.0, 5.0),
+}
+
+
+# ---------------------------------------------------------------------------
+# Cached fetches
+# ---------------------------------------------------------------------------
+# Module-level so the cache is shared across questions and sessions. A short
+# TTL keeps answers fresh; the ingestion page clears these after saving.
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_event(event_name: str) -> dict | None:
+    """Case-insensitive event lookup. Returns event row or None."""
+    db = get_supabase()
+    resp = (
+        db.table("events")
+        .select("event_id, name")
+        .ilike("name", f"%{event_name}%")
+        .order("date", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return resp.data[0] if resp.data else None
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_fights(event_id: str) -> list[dict]:
+    db = get_supabase()
+    resp = (
+        db.table("fights")
+        .select("fight_id, fighter_a, fighter_b")
+        .eq("event_id", event_id)
+        .execute()
+    )
+    return resp.data or []
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_picks_by_fight(fight_ids: tuple[str, ...]) -> dict[str, list[dict]]:
+    """Return analyst_picks rows (tags pre-attached) grouped by fight_id.
+
+    Two queries regardless of how many fights are asked for.
+    """
+    if not fight_ids:
+        return {}
+    db = get_supabase()
+    picks_resp = (
+        db.table("analyst_picks")
+        .select(
+            "pick_id, fight_id, analyst_name, platform, picked_fighter, "
+            "method_prediction, confidence_tag, reasoning_notes"
+        )
+        .in_("fight_id", list(fight_ids))
+        .execute()
+    )
+    picks = picks_resp.data or []
+    if not picks:
+        return {}
+
+    # Attach tags
+    pick_ids = [p["pick_id"] for p in picks]
+    tags_resp = (
+        db.table("pick_tags")
+        .select("pick_id, tag")
+        .in_("pick_id", pick_ids)
+        .execute()
+    )
+    tags_by_pick: dict[str, list[str]] = {}
+    for row in tags_resp.data or []:
+        tags_by_pick.setdefault(row["pick_id"], []).append(row["tag"])
+
+    picks_by_fight: dict[str, list[dict]] = {}
+    for p in picks:
+        p["tags"] = tags_by_pick.get(p["pick_id"], [])
+        picks_by_fight.setdefault(p["fight_id"], []).append(p)
+
+    return picks_by_fight
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _latest_event_name() -> str | None:
+    """Most recent event in the DB, for event questions that don't name one."""
+    db = get_supabase()
+    resp = (
+        db.table("events")
+        .select("name")
+        .order("date", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return resp.data[0]["name"] if resp.data else None
+
+
+def _first_unique(items, limit: int) -> list:
+    """First `limit` distinct items in first-seen order, stopping early."""
+    seen: dict = {}
+    for item in items:
+        seen.setdefault(item)
+        if len(seen) == limit:
+            break
+    return list(seen)
+
+
+def clear_query_cache() -> None:
+    """Drop cached chat lookups, e.g. after new picks are saved."""
+    _fetch_event.clear()
+    _latest_event_name.clear()
+    _fetch_fights.clear()
+    _fetch_picks_by_fight.clear()
+    QueryOptimizer._aggregate_picks.clear()
+
+
 # ---------------------------------------------------------------------------
 # QueryOptimizer
 # ---------------------------------------------------------------------------
@@ -33,93 +178,72 @@ class QueryOptimizer:
     # ── internal helpers ────────────────────────────────────────────────────
 
     def _get_event(self, event_name: str) -> dict | None:
-        """Case-insensitive event lookup. Returns event row or None."""
-        db = get_supabase()
-        resp = (
-            db.table("events")
-            .select("event_id, name, date, location")
-            .ilike("name", f"%{event_name}%")
-            .order("date", desc=True)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0] if resp.data else None
+        # ilike is case-insensitive, so lowercasing only improves cache hits
+        return _fetch_event(event_name.lower())
 
     def _get_fights_for_event(self, event_id: str) -> list[dict]:
-        db = get_supabase()
-        resp = (
-            db.table("fights")
-            .select("fight_id, fighter_a, fighter_b, weight_class, bout_order, status")
-            .eq("event_id", event_id)
-            .execute()
-        )
-        return resp.data or []
+        return _fetch_fights(event_id)
 
     def _get_picks_for_fight(self, fight_id: str) -> list[dict]:
         """Return analyst_picks rows for a fight, with tags pre-attached."""
-        db = get_supabase()
-        picks_resp = (
-            db.table("analyst_picks")
-            .select(
-                "pick_id, analyst_name, platform, picked_fighter, "
-                "method_prediction, confidence_tag, reasoning_notes"
-            )
-            .eq("fight_id", fight_id)
-            .execute()
-        )
-        picks = picks_resp.data or []
-        if not picks:
-            return []
-
-        # Attach tags
-        pick_ids = [p["pick_id"] for p in picks]
-        tags_resp = (
-            db.table("pick_tags")
-            .select("pick_id, tag")
-            .in_("pick_id", pick_ids)
-            .execute()
-        )
-        tags_by_pick: dict[str, list[str]] = {}
-        for row in tags_resp.data or []:
-            tags_by_pick.setdefault(row["pick_id"], []).append(row["tag"])
+        return _fetch_picks_by_fight((fight_id,)).get(fight_id, [])
 
-        for p in picks:
-            p["tags"] = tags_by_pick.get(p["pick_id"], [])
-
-        return picks
+    def _get_picks_for_fights(self, fights: list[dict]) -> dict[str, list[dict]]:
+        """Picks for every fight in `fights`, keyed by fight_id, in one batch."""
+        return _fetch_picks_by_fight(tuple(sorted(f["fight_id"] for f in fights)))
 
     def _classify_picks(
         self, picks: list[dict], fighter_a: str, fighter_b: str
     ) -> tuple[list[dict], list[dict]]:
         """
         Split picks into those for fighter_a vs fighter_b.
-        Uses rapidfuzz to handle minor name variations.
+        Uses rapidfuzz to handle minor name variations; picks that don't plainly
+        name one fighter are scored against both in a single cdist call.
         """
         picks_a, picks_b = [], []
+        fa_lower, fb_lower = fighter_a.lower(), fighter_b.lower()
+
+        # Clean data usually names exactly one of the fighters; only the rest
+        # (misspellings, nicknames, both/neither matching) need fuzzy scoring.
+        ambiguous, ambiguous_names = [], []
         for p in picks:
-            picked = p.get("picked_fighter") or ""
-            score_a = fuzz.token_set_ratio(picked.lower(), fighter_a.lower())
-            score_b = fuzz.token_set_ratio(picked.lower(), fighter_b.lower())
-            if score_a >= score_b and score_a >= 60:
+            picked = (p.get("picked_fighter") or "").lower()
+            in_a, in_b = fa_lower in picked, fb_lower in picked
+            if picked == fa_lower or (in_a and not in_b):
                 picks_a.append(p)
-            elif score_b > score_a and score_b >= 60:
+            elif picked == fb_lower or (in_b and not in_a):
                 picks_b.append(p)
+            else:
+                ambiguous.append(p)
+                ambiguous_names.append(picked)
+        if not ambiguous:
+            return picks_a, picks_b
+
+        scores = process.cdist(
+            ambiguous_names,
+            [fa_lower, fb_lower],
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=60,
+            dtype=np.uint8,
+        )
+        # argmax picks fighter_a on ties; rows below the cutoff are all zero
+        for p, best, row in zip(ambiguous, scores.argmax(axis=1), scores):
+            if not row[best]:
+                continue
+            (picks_a if best == 0 else picks_b).append(p)
         return picks_a, picks_b
 
     def _build_fighter_context(self, picks: list[dict]) -> dict:
-        all_tags: list[str] = []
+        # One pass over the picks fills all three aggregates
+        tag_counts: Counter = Counter()
+        methods: Counter = Counter()
+        rationales: list[str] = []
         for p in picks:
-            all_tags.extend(p.get("tags", []))
-
-        tag_counts = Counter(all_tags)
-        methods = Counter(
-            p["method_prediction"] for p in picks if p.get("method_prediction")
-        )
-        rationales = [
-            p["reasoning_notes"]
-            for p in picks
-            if p.get("reasoning_notes")
-        ][:3]
+            tag_counts.update(p.get("tags") or ())
+            if p.get("method_prediction"):
+                methods[p["method_prediction"]] += 1
+            if p.get("reasoning_notes") and len(rationales) < 3:
+                rationales.append(p["reasoning_notes"])
 
         return {
             "top_tags": [
@@ -141,41 +265,44 @@ class QueryOptimizer:
         """
         db = get_supabase()
 
-        # Build base query – try both orderings with ILIKE
-        def _try_order(fa_hint, fb_hint):
-            return (
+        def _contains(hint: str) -> str:
+            # Quoted so commas/parentheses in a hint can't break the or_ syntax;
+            # * is PostgREST's URL-safe wildcard for ilike.
+            cleaned = hint.replace("\\", "").replace('"', "")
+            return f'"*{cleaned}*"'
+
+        fa, fb = _contains(fighter_a_hint), _contains(fighter_b_hint)
+        try:
+            # Both orderings in one ILIKE query
+            resp = (
                 db.table("fights")
                 .select(
                     "fight_id, fighter_a, fighter_b, "
-                    "events(event_id, name, date, location)"
+                    "events(name, date)"
+                )
+                .or_(
+                    f"and(fighter_a.ilike.{fa},fighter_b.ilike.{fb}),"
+                    f"and(fighter_a.ilike.{fb},fighter_b.ilike.{fa})"
                 )
-                .ilike("fighter_a", f"%{fa_hint}%")
-                .ilike("fighter_b", f"%{fb_hint}%")
                 .order("events(date)", desc=True)
-                .limit(5)
+                .limit(10)
                 .execute()
             )
+            rows = resp.data or []
+        except Exception:
+            rows = []
 
-        for fa, fb in [
-            (fighter_a_hint, fighter_b_hint),
-            (fighter_b_hint, fighter_a_hint),
-        ]:
-            try:
-                resp = _try_order(fa, fb)
-                rows = resp.data or []
-            except Exception:
-                rows = []
-
-            if rows:
-                # If event_name specified, prefer that event
-                if event_name:
-                    for row in rows:
-                        ev = row.get("events") or {}
-                        if event_name.lower() in (ev.get("name") or "").lower():
-                            return self._format_fight_row(row)
-                return self._format_fight_row(rows[0])
+        if not rows:
+            return None
 
-        return None
+        # If event_name specified, prefer that event; otherwise the most recent
+        if event_name:
+            event_lower = event_name.lower()
+            for row in rows:
+                ev = row.get("events") or {}
+                if event_lower in (ev.get("name") or "").lower():
+                    return self._format_fight_row(row)
+        return self._format_fight_row(rows[0])
 
     def _format_fight_row(self, row: dict) -> dict:
         ev = row.get("events") or {}
@@ -215,13 +342,11 @@ class QueryOptimizer:
                 "results_entered": False,
             }
 
-        picks = self._get_picks_for_fight(fight_id)
-        if not picks:
-            return None
-
         fa = fight_meta["fighter_a"]
         fb = fight_meta["fighter_b"]
-        picks_a, picks_b = self._classify_picks(picks, fa, fb)
+        aggregated = self._aggregate_picks(fight_id, fa, fb)
+        if aggregated is None:
+            return None
 
         return {
             "fight": {
@@ -230,19 +355,33 @@ class QueryOptimizer:
                 "event": fight_meta["event"],
                 "results_entered": fight_meta.get("results_entered", False),
             },
+            **aggregated,
+        }
+
+    # Follow-up questions about the same fight reuse the classified picks.
+    # `_self` is left out of the cache key; the fighter names are cheap to hash.
+    @st.cache_data(ttl=120, show_spinner=False)
+    def _aggregate_picks(_self, fight_id: str, fa: str, fb: str) -> dict | None:
+        picks = _self._get_picks_for_fight(fight_id)
+        if not picks:
+            return None
+
+        picks_a, picks_b = _self._classify_picks(picks, fa, fb)
+
+        return {
             "summary": {
                 "total_predictions": len(picks),
                 "picks_for_a": len(picks_a),
                 "picks_for_b": len(picks_b),
             },
-            "fighter_a_context": self._build_fighter_context(picks_a),
-            "fighter_b_context": self._build_fighter_context(picks_b),
+            "fighter_a_context": _self._build_fighter_context(picks_a),
+            "fighter_b_context": _self._build_fighter_context(picks_b),
             "analyst_info": {
                 "fighter_a_high_accuracy_count": len(picks_a),
                 "fighter_b_high_accuracy_count": len(picks_b),
                 "reveal_names": True,   # always reveal in our own tracker
-                "top_analysts_a": list({p["analyst_name"] for p in picks_a})[:5],
-                "top_analysts_b": list({p["analyst_name"] for p in picks_b})[:5],
+                "top_analysts_a": _first_unique((p["analyst_name"] for p in picks_a), 5),
+                "top_analysts_b": _first_unique((p["analyst_name"] for p in picks_b), 5),
             },
         }
 
@@ -252,10 +391,11 @@ class QueryOptimizer:
             return None
 
         fights = self._get_fights_for_event(event["event_id"])
+        picks_by_fight = self._get_picks_for_fights(fights)
         consensus_picks = []
 
         for fight in fights:
-            picks = self._get_picks_for_fight(fight["fight_id"])
+            picks = picks_by_fight.get(fight["fight_id"], [])
             if not picks:
                 continue
 
@@ -284,12 +424,12 @@ class QueryOptimizer:
                 "high_accuracy_count": consensus_count,  # simplified until accuracy is tracked
             })
 
-        consensus_picks.sort(key=lambda x: x["consensus_percentage"], reverse=True)
-
         return {
             "event": event["name"],
             "results_entered": False,
-            "consensus_picks": consensus_picks,
+            "consensus_picks": heapq.nlargest(
+                MAX_CONSENSUS_PICKS, consensus_picks, key=itemgetter("consensus_percentage")
+            ),
         }
 
     def get_inside_distance_picks(self, event_name: str) -> dict | None:
@@ -298,12 +438,13 @@ class QueryOptimizer:
             return None
 
         fights = self._get_fights_for_event(event["event_id"])
+        picks_by_fight = self._get_picks_for_fights(fights)
         inside_distance_fights = []
 
         finish_methods = {"KO/TKO", "Submission", "KO", "TKO", "Sub"}
 
         for fight in fights:
-            picks = self._get_picks_for_fight(fight["fight_id"])
+            picks = picks_by_fight.get(fight["fight_id"], [])
             finish_picks = [
                 p for p in picks
                 if p.get("method_prediction") in finish_methods
@@ -323,11 +464,11 @@ class QueryOptimizer:
             favored = fight["fighter_a"] if fa_count >= fb_count else fight["fighter_b"]
             finish_count = max(fa_count, fb_count)
             method_picks = picks_a if favored == fight["fighter_a"] else picks_b
-            methods = [
-                {"method": p["method_prediction"]}
+            methods = Counter(
+                p["method_prediction"]
                 for p in method_picks
                 if p.get("method_prediction")
-            ]
+            )
 
             inside_distance_fights.append({
                 "fight": f"{fight['fighter_a']} vs {fight['fighter_b']}",
@@ -335,17 +476,15 @@ class QueryOptimizer:
                 "fighter_b": fight["fighter_b"],
                 "favored_fighter": favored,
                 "finish_prediction_count": finish_count,
-                "methods": methods,
+                "methods": dict(methods),
                 "total_finish_predictions": len(finish_picks),
             })
 
-        inside_distance_fights.sort(
-            key=lambda x: x["finish_prediction_count"], reverse=True
-        )
-
         return {
             "event": event["name"],
-            "inside_distance_picks": inside_distance_fights,
+            "inside_distance_picks": heapq.nlargest(
+                MAX_INSIDE_DISTANCE_PICKS, inside_distance_fights, key=itemgetter("finish_prediction_count")
+            ),
         }
 
     def get_event_underdogs(self, event_name: str) -> dict | None:
@@ -354,10 +493,11 @@ class QueryOptimizer:
             return None
 
         fights = self._get_fights_for_event(event["event_id"])
+        picks_by_fight = self._get_picks_for_fights(fights)
         underdog_picks = []
 
         for fight in fights:
-            picks = self._get_picks_for_fight(fight["fight_id"])
+            picks = picks_by_fight.get(fight["fight_id"], [])
             picks_a, picks_b = self._classify_picks(
                 picks, fight["fighter_a"], fight["fighter_b"]
             )
@@ -375,12 +515,12 @@ class QueryOptimizer:
             if underdog_count < 2 or underdog_count >= total / 2:
                 continue
 
-            all_tags: list[str] = []
+            tag_counts: Counter = Counter()
             for p in underdog_picks_list:
-                all_tags.extend(p.get("tags", []))
+                tag_counts.update(p.get("tags") or ())
             top_tags = [
                 {"tag": t, "count": c}
-                for t, c in Counter(all_tags).most_common(3)
+                for t, c in tag_counts.most_common(3)
             ]
 
             underdog_picks.append({
@@ -400,12 +540,12 @@ class QueryOptimizer:
                 "top_tags": top_tags,
             })
 
-        underdog_picks.sort(key=lambda x: x["value_score"], reverse=True)
-
         return {
             "event": event["name"],
             "results_entered": False,
-            "underdog_picks": underdog_picks,
+            "underdog_picks": heapq.nlargest(
+                MAX_UNDERDOG_PICKS, underdog_picks, key=itemgetter("value_score")
+            ),
         }
 
 
@@ -414,19 +554,21 @@ class QueryOptimizer:
 # ---------------------------------------------------------------------------
 
 class PromptGenerator:
-    """Builds lean, focused prompts for each query type."""
+    """Builds lean, focused system prompts for each query type.
+
+    The user's question is not embedded; it is sent as the user turn, so a
+    prompt for the same context can be served from Anthropic's prompt cache.
+    """
 
     @staticmethod
-    def build_fight_analysis_prompt(context: dict, user_question: str) -> str:
+    def build_fight_analysis_prompt(context: dict) -> str:
         fight = context["fight"]
         summary = context["summary"]
         a_ctx = context["fighter_a_context"]
         b_ctx = context["fighter_b_context"]
         analyst_info = context.get("analyst_info", {})
 
-        prompt = f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
-
-USER QUESTION: {user_question}
+        parts = [f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
 
 FIGHT CONTEXT:
 Event: {fight['event']}
@@ -436,160 +578,133 @@ PREDICTION SUMMARY:
 - Total analysts: {summary['total_predictions']}
 - Picking {fight['fighter_a']}: {summary['picks_for_a']} analysts
 - Picking {fight['fighter_b']}: {summary['picks_for_b']} analysts
-"""
+"""]
 
         for fighter, ctx in [(fight['fighter_a'], a_ctx), (fight['fighter_b'], b_ctx)]:
             if ctx['top_tags']:
-                prompt += f"\nKEY FACTORS FOR {fighter.upper()}:\n"
+                parts.append(f"\nKEY FACTORS FOR {fighter.upper()}:\n")
                 for t in ctx['top_tags'][:5]:
-                    prompt += f"- {t['tag'].replace('_', ' ')}: mentioned by {t['count']} analysts\n"
+                    parts.append(f"- {t['tag'].replace('_', ' ')}: mentioned by {t['count']} analysts\n")
             if ctx['methods']:
                 methods_str = ", ".join(
                     f"{m} ({c})" for m, c in ctx['methods'].items()
                 )
-                prompt += f"Expected methods: {methods_str}\n"
+                parts.append(f"Expected methods: {methods_str}\n")
             if ctx['example_rationales']:
-                prompt += f"\nExample analyst reasoning for {fighter}:\n"
+                parts.append(f"\nExample analyst reasoning for {fighter}:\n")
                 for i, note in enumerate(ctx['example_rationales'][:2], 1):
-                    prompt += f"{i}. {note[:200]}...\n"
+                    parts.append(f"{i}. {note[:200]}...\n")
 
         if analyst_info.get("reveal_names"):
-            prompt += f"\nTOP ANALYSTS:\n"
-            prompt += f"For {fight['fighter_a']}: {', '.join(analyst_info.get('top_analysts_a', [])[:3])}\n"
-            prompt += f"For {fight['fighter_b']}: {', '.join(analyst_info.get('top_analysts_b', [])[:3])}\n"
+            parts.append("\nTOP ANALYSTS:\n")
+            parts.append(f"For {fight['fighter_a']}: {', '.join(analyst_info.get('top_analysts_a', [])[:3])}\n")
+            parts.append(f"For {fight['fighter_b']}: {', '.join(analyst_info.get('top_analysts_b', [])[:3])}\n")
         else:
-            prompt += (
+            parts.append(
                 f"\n- {analyst_info.get('fighter_a_high_accuracy_count', 0)} analysts "
                 f"picked {fight['fighter_a']}\n"
                 f"- {analyst_info.get('fighter_b_high_accuracy_count', 0)} analysts "
                 f"picked {fight['fighter_b']}\n"
             )
 
-        prompt += """
+        parts.append("""
 INSTRUCTIONS:
 1. Answer the user's question based on the consensus and reasoning above
 2. Focus on WHY analysts favor each fighter, not just the numbers
 3. Mention specific context tags and analyst reasoning
 4. If asked about methods, reference the expected finish types
 5. Keep response conversational and insightful (2-4 paragraphs)
-
-RESPONSE:
-"""
-        return prompt
+""")
+        return "".join(parts)
 
     @staticmethod
-    def build_inside_distance_prompt(context: dict, user_question: str) -> str:
-        prompt = f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
-
-USER QUESTION: {user_question}
+    def build_inside_distance_prompt(context: dict) -> str:
+        parts = [f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
 
 EVENT: {context['event']}
 
 FIGHTERS MOST LIKELY TO WIN INSIDE THE DISTANCE (KO/TKO/SUB):
-"""
-        if not context['inside_distance_picks']:
-            prompt += "\nNo fighters have significant finish predictions for this event.\n"
-        else:
-            for idx, pick in enumerate(context['inside_distance_picks'][:10], 1):
-                method_counts: dict = {}
-                for m in pick['methods']:
-                    method_counts[m['method']] = method_counts.get(m['method'], 0) + 1
-                prompt += (
-                    f"\n{idx}. {pick['favored_fighter']} ({pick['fight']})\n"
-                    f"   - {pick['finish_prediction_count']} analysts predict finish\n"
-                    f"   - Methods: {', '.join(f'{m} ({c})' for m, c in method_counts.items())}\n"
-                )
+"""]
+        for idx, pick in enumerate(context['inside_distance_picks'], 1):
+            parts.append(
+                f"\n{idx}. {pick['favored_fighter']} ({pick['fight']})\n"
+                f"   - {pick['finish_prediction_count']} analysts predict finish\n"
+                f"   - Methods: {', '.join(f'{m} ({c})' for m, c in pick['methods'].items())}\n"
+            )
 
-        prompt += """
+        parts.append("""
 INSTRUCTIONS:
 1. Answer the user's question about which fighters are most likely to win inside the distance
 2. Focus on the fighters with the most finish predictions
 3. Mention the expected methods (KO, TKO, SUB)
 4. Keep response conversational and actionable (2-3 paragraphs)
-
-RESPONSE:
-"""
-        return prompt
+""")
+        return "".join(parts)
 
     @staticmethod
-    def build_consensus_picks_prompt(context: dict, user_question: str) -> str:
-        prompt = f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
-
-USER QUESTION: {user_question}
+    def build_consensus_picks_prompt(context: dict) -> str:
+        parts = [f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
 
 EVENT: {context['event']}
 
 CONSENSUS PICKS (sorted by strength):
-"""
+"""]
         for idx, pick in enumerate(context['consensus_picks'], 1):
             other = pick['fighter_a'] if pick['consensus_fighter'] == pick['fighter_b'] else pick['fighter_b']
-            prompt += (
+            parts.append(
                 f"\n{idx}. {pick['consensus_fighter']} over {other}\n"
                 f"   - Consensus: {pick['consensus_count']}-{pick['opposing_count']} "
                 f"({pick['consensus_percentage']:.0f}%)\n"
             )
 
-        prompt += """
+        parts.append("""
 INSTRUCTIONS:
 1. Answer the user's question about consensus picks
 2. Focus on the strongest consensus picks (highest percentages)
 3. Highlight interesting patterns or contrarian fights
 4. Keep response conversational and actionable (2-3 paragraphs)
-
-RESPONSE:
-"""
-        return prompt
+""")
+        return "".join(parts)
 
     @staticmethod
-    def build_underdogs_prompt(context: dict, user_question: str) -> str:
-        prompt = f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
-
-USER QUESTION: {user_question}
+    def build_underdogs_prompt(context: dict) -> str:
+        parts = [f"""You are ChatMMAPicks, an AI that synthesizes MMA analyst predictions.
 
 EVENT: {context['event']}
 
 BEST UNDERDOG PICKS (sorted by value):
-"""
-        if not context['underdog_picks']:
-            prompt += "\nNo clear underdog opportunities identified for this event.\n"
-        else:
-            for idx, pick in enumerate(context['underdog_picks'][:8], 1):
-                prompt += (
-                    f"\n{idx}. {pick['underdog']} ({pick['fight']})\n"
-                    f"   - Underdog pick: {pick['underdog_count']}-{pick['favorite_count']} "
-                    f"({pick['underdog_percentage']:.0f}%)\n"
-                )
-                if pick['top_tags']:
-                    tags_str = ', '.join(t['tag'].replace('_', ' ') for t in pick['top_tags'])
-                    prompt += f"   - Key factors: {tags_str}\n"
-                if pick['high_accuracy_analysts']:
-                    names = [a['name'] for a in pick['high_accuracy_analysts'][:3]]
-                    prompt += f"   - Backed by: {', '.join(names)}\n"
-
-        prompt += """
+"""]
+        for idx, pick in enumerate(context['underdog_picks'], 1):
+            parts.append(
+                f"\n{idx}. {pick['underdog']} ({pick['fight']})\n"
+                f"   - Underdog pick: {pick['underdog_count']}-{pick['favorite_count']} "
+                f"({pick['underdog_percentage']:.0f}%)\n"
+            )
+            if pick['top_tags']:
+                tags_str = ', '.join(t['tag'].replace('_', ' ') for t in pick['top_tags'])
+                parts.append(f"   - Key factors: {tags_str}\n")
+            if pick['high_accuracy_analysts']:
+                names = [a['name'] for a in pick['high_accuracy_analysts'][:3]]
+                parts.append(f"   - Backed by: {', '.join(names)}\n")
+
+        parts.append("""
 INSTRUCTIONS:
 1. Answer the user's question about underdog picks
 2. Explain why these underdogs have potential despite being less popular picks
 3. Keep response conversational and actionable (2-3 paragraphs)
-
-RESPONSE:
-"""
-        return prompt
+""")
+        return "".join(parts)
 
     @staticmethod
-    def build_general_prompt(user_question: str) -> str:
-        return f"""You are ChatMMAPicks, an AI assistant for MMA predictions.
-
-The user asked: {user_question}
+    def build_general_prompt() -> str:
+        return """You are ChatMMAPicks, an AI assistant for MMA predictions.
 
-This appears to be a general question. Respond helpfully and direct them to ask about
+The user's message appears to be a general question. Respond helpfully and direct them to ask about
 specific fights or events if appropriate. You can answer questions about:
 - Specific fights ("who will win Jones vs Miocic?")
 - Consensus picks ("what are the top picks for UFC 309?")
 - Finish predictions ("who is likely to win inside the distance?")
 - Underdogs ("best underdog picks for UFC Vegas 100?")
-
-RESPONSE:
 """
 
 
@@ -597,11 +712,40 @@ RESPONSE:
 # ChatMMABot
 # ---------------------------------------------------------------------------
 
+def _keyword_re(keywords: list[str]) -> re.Pattern:
+    """One alternation matching any keyword as a plain substring (same as `kw in q`)."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+_INSIDE_DISTANCE_RE = _keyword_re([
+    "inside the distance", "inside distance", "finish",
+    "knockout", " ko ", "submission", "most likely to finish",
+    "not go the distance",
+])
+_CONSENSUS_RE = _keyword_re([
+    "consensus", "top picks", "favorites", "who should win",
+    "most likely to win", "best bets", "safest picks", "locks",
+])
+_UNDERDOGS_RE = _keyword_re([
+    "underdog", "upset", "dark horse", "value pick", "sleeper",
+    "best underdog", "undervalued", "contrarian",
+])
+_NAME_CLEAN_RE = re.compile(r"[^\w\s']")
+_NUMBERED_EVENT_RE = re.compile(r"ufc\s+(\d+|vegas\s+\d+|fight\s+night\s+\d+)")
+_NAMED_EVENT_RE = re.compile(r"ufc\s+([a-z][a-z\s]{1,25}?)(?:\s|$|[?!.,])")
+
+
+@st.cache_resource(show_spinner=False)
+def get_anthropic(api_key: str) -> Anthropic:
+    """One Anthropic client (and connection pool) per API key."""
+    return Anthropic(api_key=api_key)
+
+
 class ChatMMABot:
     """Main chatbot: detects query type, fetches context, calls Claude."""
 
     def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+        self.client = get_anthropic(api_key)
         self.model = "claude-sonnet-4-6"
         self.optimizer = QueryOptimizer()
         self.generator = PromptGenerator()
@@ -612,34 +756,15 @@ class ChatMMABot:
         q = question.lower()
 
         # Inside the distance
-        if any(
-            kw in q
-            for kw in [
-                "inside the distance", "inside distance", "finish",
-                "knockout", " ko ", "submission", "most likely to finish",
-                "not go the distance",
-            ]
-        ):
+        if _INSIDE_DISTANCE_RE.search(q):
             return ("inside_distance", {"event_name": self._extract_event_name(q)})
 
         # Consensus
-        if any(
-            kw in q
-            for kw in [
-                "consensus", "top picks", "favorites", "who should win",
-                "most likely to win", "best bets", "safest picks", "locks",
-            ]
-        ):
+        if _CONSENSUS_RE.search(q):
             return ("consensus_picks", {"event_name": self._extract_event_name(q)})
 
         # Underdogs
-        if any(
-            kw in q
-            for kw in [
-                "underdog", "upset", "dark horse", "value pick", "sleeper",
-                "best underdog", "undervalued", "contrarian",
-            ]
-        ):
+        if _UNDERDOGS_RE.search(q):
             return ("underdogs", {"event_name": self._extract_event_name(q)})
 
         # Fight-specific  ("X vs Y")
@@ -651,21 +776,21 @@ class ChatMMABot:
                     right_words = parts[1].strip().split()
                     fa_words = left_words[-2:] if len(left_words) >= 2 else left_words[-1:]
                     fb_words = right_words[:2] if len(right_words) >= 2 else right_words[:1]
-                    fa = re.sub(r"[^\w\s']", "", " ".join(fa_words)).strip().title()
-                    fb = re.sub(r"[^\w\s']", "", " ".join(fb_words)).strip().title()
+                    fa = _NAME_CLEAN_RE.sub("", " ".join(fa_words)).strip().title()
+                    fb = _NAME_CLEAN_RE.sub("", " ".join(fb_words)).strip().title()
                     return ("fight_specific", {"fighter_a": fa, "fighter_b": fb, "event_name": None})
 
         return ("general", {})
 
     def _extract_event_name(self, q: str) -> str | None:
         # 1. Numbered events: UFC 324, UFC Vegas 100, UFC Fight Night 100
-        m = re.search(r"ufc\s+(\d+|vegas\s+\d+|fight\s+night\s+\d+)", q)
+        m = _NUMBERED_EVENT_RE.search(q)
         if m:
             return f"UFC {m.group(1).title()}"
 
         # 2. City / name-based events: "UFC Houston", "UFC London", "UFC Rio"
         #    Grab the 1-3 words that follow "ufc" and look them up in the DB.
-        m = re.search(r"ufc\s+([a-z][a-z\s]{1,25}?)(?:\s|$|[?!.,])", q)
+        m = _NAMED_EVENT_RE.search(q)
         if m:
             candidate = m.group(1).strip()
             # Skip if the word(s) are query keywords, not an event name
@@ -674,28 +799,12 @@ class ChatMMABot:
                 "picks", "fights", "card", "event", "show", "odds", "fight",
             }
             if candidate not in _skip:
-                db = get_supabase()
-                resp = (
-                    db.table("events")
-                    .select("name")
-                    .ilike("name", f"%{candidate}%")
-                    .order("date", desc=True)
-                    .limit(1)
-                    .execute()
-                )
-                if resp.data:
-                    return resp.data[0]["name"]
+                event = _fetch_event(candidate)
+                if event:
+                    return event["name"]
 
-        # 3. Fall back to the most recent event in the DB
-        db = get_supabase()
-        resp = (
-            db.table("events")
-            .select("name")
-            .order("date", desc=True)
-            .limit(1)
-            .execute()
-        )
-        return resp.data[0]["name"] if resp.data else None
+        # 3. No event named; handlers fall back to _latest_event_name()
+        return None
 
     # ── query handlers ───────────────────────────────────────────────────────
 
@@ -709,16 +818,56 @@ class ChatMMABot:
             "underdogs":       self._handle_underdogs,
             "general":         self._handle_general,
         }
-        return handlers[query_type](user_question, details)
+        try:
+            return handlers[query_type](user_question, details)
+        except PromptTooLargeError as exc:
+            # count_tokens is free, so the refusal is recorded at zero cost
+            cost = self._estimate_cost(SimpleNamespace(input_tokens=0, output_tokens=0), exc.model)
+            cost["counted_input_tokens"] = exc.input_tokens
+            return {
+                "answer": (
+                    f"That question pulls in too much prediction data ({exc.input_tokens:,} tokens, "
+                    f"limit {MAX_INPUT_TOKENS:,}), so I didn't send it. "
+                    "Try a narrower question, such as a single fight or event."
+                ),
+                "metadata": {"query_type": "prompt_too_large", "cost_estimate": cost},
+            }
 
-    def _call_claude(self, prompt: str, max_tokens: int = 800) -> tuple[str, dict]:
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        cost = self._estimate_cost(response.usage)
-        return response.content[0].text, cost
+    def _call_claude(
+        self, system_prompt: str, question: str, max_tokens: int = 800, query_type: str | None = None
+    ) -> tuple[Iterator[str], dict]:
+        """Stream the answer text; the returned cost dict is filled once the stream ends."""
+        model = MODEL_BY_QUERY_TYPE.get(query_type, self.model)
+        # Context + instructions are the only candidate prefix; the question varies.
+        # Most of these prompts are a few hundred tokens, below the minimum the
+        # API will cache (1024 for Sonnet, 4096 for Haiku 4.5), so the breakpoint
+        # is usually a no-op. Real cache hits show up as cache_read_input_tokens.
+        system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        messages = [{"role": "user", "content": question}]
+
+        cost: dict = {}
+
+        # ~4 chars per token. Only prompts that might be over the ceiling pay
+        # for an exact count_tokens round-trip before the real request.
+        if (len(system_prompt) + len(question)) // 4 > MAX_INPUT_TOKENS * 0.8:
+            counted = self.client.messages.count_tokens(
+                model=model, system=system, messages=messages
+            )
+            if counted.input_tokens > MAX_INPUT_TOKENS:
+                raise PromptTooLargeError(counted.input_tokens, model)
+            cost["counted_input_tokens"] = counted.input_tokens
+
+        def stream() -> Iterator[str]:
+            with self.client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=messages,
+            ) as s:
+                yield from s.text_stream
+                cost.update(self._estimate_cost(s.get_final_message().usage, model))
+
+        return stream(), cost
 
     def _handle_fight_specific(self, question: str, details: dict) -> dict:
         fa, fb = details["fighter_a"], details["fighter_b"]
@@ -744,8 +893,8 @@ class ChatMMABot:
                 "metadata": {"query_type": "no_predictions"},
             }
 
-        prompt = self.generator.build_fight_analysis_prompt(context, question)
-        answer, cost = self._call_claude(prompt, max_tokens=800)
+        prompt = self.generator.build_fight_analysis_prompt(context)
+        answer, cost = self._call_claude(prompt, question, max_tokens=800)
         return {
             "answer": answer,
             "metadata": {
@@ -756,7 +905,7 @@ class ChatMMABot:
         }
 
     def _handle_inside_distance(self, question: str, details: dict) -> dict:
-        event_name = details.get("event_name")
+        event_name = details.get("event_name") or _latest_event_name()
         if not event_name:
             return {
                 "answer": "Please specify an event (e.g., 'UFC 309') to get inside-distance predictions.",
@@ -768,15 +917,20 @@ class ChatMMABot:
                 "answer": f"I don't have predictions for '{event_name}' yet.",
                 "metadata": {"query_type": "event_not_found"},
             }
-        prompt = self.generator.build_inside_distance_prompt(context, question)
-        answer, cost = self._call_claude(prompt, max_tokens=800)
+        if not context["inside_distance_picks"]:
+            return {
+                "answer": f"Found '{event_name}', but no fighters have significant finish predictions yet.",
+                "metadata": {"query_type": "no_inside_distance"},
+            }
+        prompt = self.generator.build_inside_distance_prompt(context)
+        answer, cost = self._call_claude(prompt, question, max_tokens=800)
         return {
             "answer": answer,
             "metadata": {"query_type": "inside_distance", "cost_estimate": cost},
         }
 
     def _handle_consensus_picks(self, question: str, details: dict) -> dict:
-        event_name = details.get("event_name")
+        event_name = details.get("event_name") or _latest_event_name()
         if not event_name:
             return {
                 "answer": "Please specify an event (e.g., 'UFC 309') to get consensus picks.",
@@ -793,15 +947,15 @@ class ChatMMABot:
                 "answer": f"Found '{event_name}', but not enough predictions to determine consensus yet.",
                 "metadata": {"query_type": "no_consensus"},
             }
-        prompt = self.generator.build_consensus_picks_prompt(context, question)
-        answer, cost = self._call_claude(prompt, max_tokens=1000)
+        prompt = self.generator.build_consensus_picks_prompt(context)
+        answer, cost = self._call_claude(prompt, question, max_tokens=1000)
         return {
             "answer": answer,
             "metadata": {"query_type": "consensus_picks", "cost_estimate": cost},
         }
 
     def _handle_underdogs(self, question: str, details: dict) -> dict:
-        event_name = details.get("event_name")
+        event_name = details.get("event_name") or _latest_event_name()
         if not event_name:
             return {
                 "answer": "Please specify an event (e.g., 'UFC 309') to get underdog picks.",
@@ -818,16 +972,16 @@ class ChatMMABot:
                 "answer": f"Found '{event_name}', but no clear underdogs — consensus is strong across all fights.",
                 "metadata": {"query_type": "no_underdogs"},
             }
-        prompt = self.generator.build_underdogs_prompt(context, question)
-        answer, cost = self._call_claude(prompt, max_tokens=1000)
+        prompt = self.generator.build_underdogs_prompt(context)
+        answer, cost = self._call_claude(prompt, question, max_tokens=1000)
         return {
             "answer": answer,
             "metadata": {"query_type": "underdogs", "cost_estimate": cost},
         }
 
     def _handle_general(self, question: str, details: dict) -> dict:
-        prompt = self.generator.build_general_prompt(question)
-        answer, cost = self._call_claude(prompt, max_tokens=400)
+        prompt = self.generator.build_general_prompt()
+        answer, cost = self._call_claude(prompt, question, max_tokens=400, query_type="general")
         return {
             "answer": answer,
             "metadata": {"query_type": "general", "cost_estimate": cost},
@@ -836,12 +990,30 @@ class ChatMMABot:
     # ── cost estimation ─────────────────────────────────────────────────────
 
     @staticmethod
-    def _estimate_cost(usage) -> dict:
-        input_cost = (usage.input_tokens / 1_000_000) * 3.0
-        output_cost = (usage.output_tokens / 1_000_000) * 15.0
+    def _estimate_cost(usage, model: str) -> dict:
+        # The four billing categories, priced separately for `model`.
+        # input_tokens already excludes cached tokens.
+        in_rate, out_rate = MODEL_PRICING.get(model, MODEL_PRICING["claude-sonnet-4-6"])
+        fresh_in = usage.input_tokens
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        out = usage.output_tokens
+
+        fresh_input_usd = fresh_in * in_rate / 1_000_000
+        cache_read_usd = cache_read * in_rate * 0.1 / 1_000_000
+        cache_creation_usd = cache_write * in_rate * 1.25 / 1_000_000
+        output_usd = out * out_rate / 1_000_000
+        total_input = fresh_in + cache_read + cache_write
         return {
-            "input_tokens": usage.input_tokens,
-            "output_tokens": usage.output_tokens,
-            "total_tokens": usage.input_tokens + usage.output_tokens,
-            "cost_usd": round(input_cost + output_cost, 5),
+            "input_tokens": total_input,
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_write,
+            "output_tokens": out,
+            "total_tokens": total_input + out,
+            "fresh_input_usd": round(fresh_input_usd, 6),
+            "cache_read_usd": round(cache_read_usd, 6),
+            "cache_creation_usd": round(cache_creation_usd, 6),
+            "output_usd": round(output_usd, 6),
+            "cost_usd": round(fresh_input_usd + cache_read_usd + cache_creation_usd + output_usd, 5),
+            "model": model,
         }
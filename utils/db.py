@@ -18,6 +18,20 @@ def get_fighter_aliases() -> list[dict]:
     return resp.data or []
 
 
+@st.cache_data(ttl=300)
+def get_alias_index() -> dict[str, str]:
+    """Map each alias and canonical name (stripped, casefolded) to its canonical name."""
+    aliases = get_fighter_aliases()
+    index = {row["alias"].strip().casefold(): row["canonical_name"] for row in aliases}
+    index.update({row["canonical_name"].strip().casefold(): row["canonical_name"] for row in aliases})
+    return index
+
+
+def _aliases_changed() -> None:
+    get_fighter_aliases.clear()
+    get_alias_index.clear()
+
+
 def save_alias(canonical_name: str, alias: str) -> None:
     """Upsert a fighter alias and bust the cache."""
     db = get_supabase()
@@ -25,17 +39,24 @@ def save_alias(canonical_name: str, alias: str) -> None:
         {"canonical_name": canonical_name, "alias": alias},
         on_conflict="alias",
     ).execute()
-    get_fighter_aliases.clear()
+    _aliases_changed()
 
 
-def get_or_create_event(
-    name: str,
-    date: str | None = None,
-    location: str | None = None,
-) -> str:
-    """Return event_id for an existing event (case-insensitive) or create a new one.
-    If the event already exists, fills in date/location if they were previously blank.
-    """
+def save_aliases_bulk(pairs: list[tuple[str, str]]) -> None:
+    """Upsert many (canonical_name, alias) pairs in one request and bust the cache."""
+    if not pairs:
+        return
+    db = get_supabase()
+    db.table("fighter_aliases").upsert(
+        [{"canonical_name": canon, "alias": alias} for canon, alias in pairs],
+        on_conflict="alias",
+    ).execute()
+    _aliases_changed()
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _lookup_event(name: str) -> dict | None:
+    """Case-insensitive event row (event_id, date, location) by name, or None."""
     db = get_supabase()
     resp = (
         db.table("events")
@@ -44,77 +65,61 @@ def get_or_create_event(
         .limit(1)
         .execute()
     )
-    if resp.data:
-        event_id = resp.data[0]["event_id"]
-        updates: dict = {}
-        if date and not resp.data[0].get("date"):
-            updates["date"] = date
-        if location and not resp.data[0].get("location"):
-            updates["location"] = location
-        if updates:
-            db.table("events").update(updates).eq("event_id", event_id).execute()
-        return event_id
-
-    insert_data: dict = {"name": name}
-    if date:
-        insert_data["date"] = date
-    if location:
-        insert_data["location"] = location
-    resp = db.table("events").insert(insert_data).execute()
-    return resp.data[0]["event_id"]
-
-
-def get_or_create_fight(
-    event_id: str,
-    fighter_a: str,
-    fighter_b: str,
-    weight_class: str | None = None,
-) -> str:
-    """Return fight_id for an existing fight (either order) or create a new one.
-    If the fight already exists, fills in weight_class if it was previously blank.
-    """
-    db = get_supabase()
-    for fa, fb in [(fighter_a, fighter_b), (fighter_b, fighter_a)]:
-        resp = (
-            db.table("fights")
-            .select("fight_id, weight_class")
-            .eq("event_id", event_id)
-            .eq("fighter_a", fa)
-            .eq("fighter_b", fb)
-            .execute()
-        )
-        if resp.data:
-            fight_id = resp.data[0]["fight_id"]
-            if weight_class and not resp.data[0].get("weight_class"):
-                db.table("fights").update({"weight_class": weight_class}).eq("fight_id", fight_id).execute()
-            return fight_id
+    return resp.data[0] if resp.data else None
+
 
-    insert_data: dict = {"event_id": event_id, "fighter_a": fighter_a, "fighter_b": fighter_b}
-    if weight_class:
-        insert_data["weight_class"] = weight_class
-    resp = db.table("fights").insert(insert_data).execute()
-    return resp.data[0]["fight_id"]
+def _events_changed() -> None:
+    _lookup_event.clear()
+    get_events.clear()
 
 
-def save_analyst_pick(pick_data: dict) -> str:
-    """Insert a row into analyst_picks and return the new pick_id."""
+def get_or_create_event(
+    name: str,
+    date: str | None = None,
+    location: str | None = None,
+) -> str:
+    """Return event_id for an existing event (case-insensitive) or create a new one.
+    If the event already exists, fills in date/location if they were previously blank.
+    """
+    existing = _lookup_event(name)
+    if existing:
+        fills_blank = (date and not existing.get("date")) or (location and not existing.get("location"))
+        if not fills_blank:
+            return existing["event_id"]
+
+    # Insert-or-fill in one atomic call (supabase_migration_get_or_create_rpc.sql)
     db = get_supabase()
-    resp = db.table("analyst_picks").insert(pick_data).execute()
-    return resp.data[0]["pick_id"]
+    resp = db.rpc(
+        "get_or_create_event",
+        {"p_name": name, "p_date": date or None, "p_location": location or None},
+    ).execute()
+    _events_changed()
+    return resp.data
 
 
-def save_pick_tags(pick_id: str, tags: list[str]) -> None:
-    """Insert tags for a pick (skips empty list)."""
-    if not tags:
-        return
+def save_picks_bulk(event_id: str, picks: list[dict], on_progress=None) -> int:
+    """Save many picks for an event atomically; return the count saved.
+
+    Each pick is an analyst_picks row plus "fighter_a", "fighter_b",
+    "weight_class" and "tags" keys. Fights, picks and tags are written by one
+    save_picks call (supabase_migration_save_picks_rpc.sql) in a single
+    transaction, so a failed save writes nothing and retrying can't duplicate picks.
+    `on_progress` (optional) is called with (fraction, label) before and after.
+    """
+    if not picks:
+        return 0
+    if on_progress:
+        on_progress(0.0, f"Saving {len(picks)} pick(s)…")
     db = get_supabase()
-    rows = [{"pick_id": pick_id, "tag": t.strip()} for t in tags if t.strip()]
-    if rows:
-        db.table("pick_tags").insert(rows).execute()
+    resp = db.rpc("save_picks", {"p_event_id": event_id, "p_picks": picks}).execute()
+    if on_progress:
+        on_progress(1.0, "Saved.")
+    return resp.data
 
 
+@st.cache_data(ttl=600, show_spinner=False)
 def get_events() -> list[dict]:
-    """Return all events ordered by date descending."""
+    """Return all events ordered by date descending (cached 10 min, cleared on writes)."""
     db = get_supabase()
     resp = (
         db.table("events")
@@ -129,62 +134,37 @@ def get_picks_for_event(event_id: str) -> list[dict]:
     """Return a flat list of all picks for an event, joined with fight and event data."""
     db = get_supabase()
 
-    # Get all fights for this event
-    fights_resp = (
-        db.table("fights")
-        .select("fight_id, fighter_a, fighter_b, weight_class, bout_order")
-        .eq("event_id", event_id)
+    # One request: picks with their fight (inner join, filtered to this event),
+    # the fight's event and the pick's tags embedded by PostgREST.
+    resp = (
+        db.table("analyst_picks")
+        .select(
+            "analyst_name, platform, picked_fighter, "
+            "method_prediction, confidence_tag, reasoning_notes, "
+            "fights!inner(fighter_a, fighter_b, weight_class, bout_order, "
+            "events(name, date, location)), "
+            "pick_tags(tag)"
+        )
+        .eq("fights.event_id", event_id)
         .execute()
     )
-    fights = {f["fight_id"]: f for f in (fights_resp.data or [])}
-
-    if not fights:
+    picks = resp.data or []
+    if not picks:
         return []
 
-    # Get event info
-    event_resp = (
-        db.table("events")
-        .select("name, date, location")
-        .eq("event_id", event_id)
-        .limit(1)
-        .execute()
-    )
-    event = event_resp.data[0] if event_resp.data else {}
+    event = picks[0]["fights"].get("events") or {}
 
-    # Get all picks for those fights
-    fight_ids = list(fights.keys())
-    picks_resp = (
-        db.table("analyst_picks")
-        .select("pick_id, fight_id, analyst_name, platform, source_url, picked_fighter, method_prediction, confidence_tag, reasoning_notes, created_at")
-        .in_("fight_id", fight_ids)
-        .execute()
-    )
-    picks = picks_resp.data or []
-
-    # Get tags for all picks
-    pick_ids = [p["pick_id"] for p in picks]
-    tags_by_pick: dict[str, list[str]] = {}
-    if pick_ids:
-        tags_resp = (
-            db.table("pick_tags")
-            .select("pick_id, tag")
-            .in_("pick_id", pick_ids)
-            .execute()
-        )
-        for row in (tags_resp.data or []):
-            tags_by_pick.setdefault(row["pick_id"], []).append(row["tag"])
-
-    # Assemble flat rows
-    rows = []
+    # Assemble flat rows, keeping each row's bout_order alongside it for sorting
+    keyed_rows = []
     for pick in picks:
-        fight = fights.get(pick["fight_id"], {})
-        tags = tags_by_pick.get(pick["pick_id"], [])
+        fight = pick.get("fights") or {}
+        tags = [t["tag"] for t in pick.get("pick_tags") or []]
         context_parts = [pick.get("reasoning_notes") or ""]
         if tags:
             context_parts.append(", ".join(tags))
         context = " | ".join(p for p in context_parts if p)
 
-        rows.append({
+        keyed_rows.append((fight.get("bout_order") or 999, {
             "date": event.get("date") or "",
             "analyst": pick.get("analyst_name") or "",
             "platform": pick.get("platform") or pick.get("analyst_name") or "",
@@ -197,12 +177,8 @@ def get_picks_for_event(event_id: str) -> list[dict]:
             # Extra columns available in the DB but not in the original CSV
             "method": pick.get("method_prediction") or "",
             "confidence": pick.get("confidence_tag") or "",
-        })
-
-    # Sort by fight bout_order if available, then analyst name
-    rows.sort(key=lambda r: (
-        fights.get(next((p["fight_id"] for p in picks if p["analyst_name"] == r["analyst"]), ""), {}).get("bout_order") or 999,
-        r["analyst"],
-    ))
+        }))
 
-    return rows
+    # Sort by the row's own fight bout_order if available, then analyst name
+    keyed_rows.sort(key=lambda kr: (kr[0], kr[1]["analyst"]))
+    return [row for _, row in keyed_rows]